@@ -286,6 +286,9 @@ class Settings(BaseSettings):
     max_concurrent_tasks: int = Field(
         3, description="Maximum concurrent background tasks across all projects"
     )
+    task_retry_delay_seconds: float = Field(
+        30.0, description="Delay before retrying a failed background task (seconds)"
+    )
 
     # LLM Provider
     llm_provider: str = Field(
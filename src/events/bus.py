@@ -65,6 +65,10 @@ class EventBus:
         """Register a handler that receives all events."""
         self._global_handlers.append(handler)
 
+    def handler_count(self, event_type: Type[Event]) -> int:
+        """Return the number of handlers subscribed to an event type."""
+        return len(self._handlers.get(event_type, ()))
+
     async def publish(self, event: Event) -> None:
         """Publish an event to be processed by matching handlers."""
         logger.info(
@@ -273,7 +273,9 @@ async def create_application(config: Settings) -> Dict[str, Any]:
     router_provider = chat_pool.get_router_provider()
     fact_extractor = FactExtractor(chat_provider=router_provider)
     memory_manager = MemoryManager(
-        db_manager=storage.db_manager, extractor=fact_extractor
+        db_manager=storage.db_manager,
+        extractor=fact_extractor,
+        batch_summaries=True,
     )
     logger.info("Memory system initialized")
 
@@ -311,6 +313,7 @@ async def create_application(config: Settings) -> Dict[str, Any]:
         "config": config,
         "features": features,
         "event_bus": event_bus,
+        "memory_manager": memory_manager,
         "agent_handler": agent_handler,
         "auth_manager": auth_manager,
         "security_validator": security_validator,
@@ -326,6 +329,7 @@ async def run_application(app: Dict[str, Any]) -> None:
     config: Settings = app["config"]
     features: FeatureFlags = app["features"]
     event_bus: EventBus = app["event_bus"]
+    memory_manager: MemoryManager = app["memory_manager"]
 
     notification_service: Optional[NotificationService] = None
     scheduler: Optional[JobScheduler] = None
@@ -471,7 +475,8 @@ async def run_application(app: Dict[str, Any]) -> None:
         logger.error("Application error", error=str(e))
         raise
     finally:
-        # Ordered shutdown: scheduler -> API -> notification -> bot -> claude -> storage
+        # Ordered shutdown: scheduler -> API -> notification -> bot -> claude
+        # -> memory -> storage
         logger.info("Shutting down application")
 
         try:
@@ -482,6 +487,8 @@ async def run_application(app: Dict[str, Any]) -> None:
             await event_bus.stop()
             await bot.stop()
             await claude_integration.shutdown()
+            # Buffered conversation summaries must land before the pool closes
+            await memory_manager.flush()
             await storage.close()
         except Exception as e:
             logger.error("Error during shutdown", error=str(e))
@@ -1,15 +1,32 @@
 """LLM-based fact extraction from conversations."""
 
-import json
+import asyncio
+import hashlib
+import sys
+from collections import OrderedDict
 from typing import Any, Optional
 
 import structlog
+from pydantic import BaseModel, ConfigDict, OnErrorOmit, TypeAdapter, ValidationError
 
 from .models import UserFact
 
 logger = structlog.get_logger()
 
-EXTRACT_FACTS_SYSTEM = """\
+# Number of distinct exchanges whose extraction result is kept in memory
+FACT_CACHE_SIZE = 1024
+
+# Exchanges where both sides are shorter than this are not worth a provider call
+MIN_MESSAGE_LEN = 10
+# Per-side character budget of the exchange sent for fact extraction
+MAX_MESSAGE_CHARS = 500
+# Number of trailing messages and per-message characters used for summaries
+MAX_HISTORY = 20
+MAX_CONTENT_CHARS = 200
+
+# Prompts are interned so every provider call shares one identity-comparable str
+EXTRACT_FACTS_SYSTEM = sys.intern(
+    """\
 Extract any new facts about the user from this exchange.
 Return a JSON array: [{"category": "preference|personal|work|location|contact|technical", "fact": "..."}]
 If no new facts, return [].
@@ -21,11 +38,32 @@ Categories:
 - location: city, timezone, country
 - contact: email, phone (only if explicitly shared)
 - technical: programming languages, tools, frameworks they use"""
+)
 
-SUMMARIZE_SYSTEM = """\
+SUMMARIZE_SYSTEM = sys.intern(
+    """\
 Summarize this conversation session in 2-3 sentences.
 Focus on: decisions made, tasks completed, key topics discussed.
 Start with the date if available."""
+)
+
+
+class _FactItem(BaseModel):
+    """A single entry of the fact array returned by the LLM."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    category: str
+    fact: str
+
+
+# Built once at import; validates the raw JSON reply in a single native call.
+# Malformed entries are omitted and unknown keys are never turned into Python
+# objects, so large replies only allocate the two fields we keep.
+_FACT_LIST_ADAPTER = TypeAdapter(list[OnErrorOmit[_FactItem]])
+
+# The usual "no new facts" reply; recognised without running the JSON parser
+_EMPTY_REPLIES = ("[]", b"[]")
 
 
 class FactExtractor:
@@ -33,6 +71,8 @@ class FactExtractor:
 
     def __init__(self, chat_provider: Any = None) -> None:
         self._provider = chat_provider
+        # Exact-match LRU: exchange digest -> extracted (category, fact) pairs
+        self._cache: OrderedDict[bytes, tuple[tuple[str, str], ...]] = OrderedDict()
 
     async def extract(
         self,
@@ -44,54 +84,68 @@ class FactExtractor:
         if not self._provider:
             return []
 
-        if len(user_message) < 10 and len(bot_response) < 10:
+        if len(user_message) < MIN_MESSAGE_LEN and len(bot_response) < MIN_MESSAGE_LEN:
             return []
 
-        exchange = f"User: {user_message[:500]}\nAssistant: {bot_response[:500]}"
+        # Truncate once; the same prompt string doubles as the cache key
+        exchange = (
+            f"User: {user_message[:MAX_MESSAGE_CHARS]}\n"
+            f"Assistant: {bot_response[:MAX_MESSAGE_CHARS]}"
+        )
+        key = hashlib.blake2b(exchange.encode(), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return self._build_facts(cached, user_id)
 
         try:
             raw = await self._provider.classify(
                 prompt=exchange,
                 system=EXTRACT_FACTS_SYSTEM,
             )
-            data = json.loads(raw.strip())
-
-            if not isinstance(data, list):
-                return []
-
-            facts = []
-            for item in data:
-                if isinstance(item, dict) and "category" in item and "fact" in item:
-                    facts.append(
-                        UserFact(
-                            user_id=user_id,
-                            category=item["category"],
-                            fact=item["fact"],
-                            source="auto_extract",
-                        )
-                    )
-            return facts
-
-        except (json.JSONDecodeError, KeyError, TypeError) as exc:
+            if raw.strip() in _EMPTY_REPLIES:
+                items = []
+            else:
+                items = _FACT_LIST_ADAPTER.validate_json(raw)
+        except ValidationError as exc:
             logger.debug("Fact extraction parse error", error=str(exc))
             return []
         except Exception as exc:
             logger.warning("Fact extraction failed", error=str(exc))
             return []
 
+        pairs = tuple((item.category, item.fact) for item in items)
+        self._cache[key] = pairs
+        if len(self._cache) > FACT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+        return self._build_facts(pairs, user_id)
+
+    @staticmethod
+    def _build_facts(
+        pairs: tuple[tuple[str, str], ...], user_id: int
+    ) -> list[UserFact]:
+        """Create fresh UserFact objects for the given user."""
+        return [
+            UserFact(
+                user_id=user_id,
+                category=category,
+                fact=fact,
+                source="auto_extract",
+            )
+            for category, fact in pairs
+        ]
+
     async def summarize(self, messages: list[dict[str, str]]) -> Optional[str]:
         """Generate a conversation summary."""
         if not self._provider or len(messages) < 2:
             return None
 
         # Build a condensed transcript
-        lines = []
-        for msg in messages[-20:]:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")[:200]
-            lines.append(f"{role}: {content}")
-
-        transcript = "\n".join(lines)
+        transcript = "\n".join(
+            f"{msg.get('role', 'user')}: {msg.get('content', '')[:MAX_CONTENT_CHARS]}"
+            for msg in messages[-MAX_HISTORY:]
+        )
 
         try:
             response = await self._provider.chat(
@@ -106,3 +160,16 @@ class FactExtractor:
         except Exception as exc:
             logger.warning("Conversation summarization failed", error=str(exc))
             return None
+
+    async def process(
+        self,
+        user_message: str,
+        bot_response: str,
+        user_id: int,
+        history: list[dict[str, str]],
+    ) -> tuple[list[UserFact], Optional[str]]:
+        """Extract facts and summarize the session concurrently."""
+        async with asyncio.TaskGroup() as tg:
+            facts = tg.create_task(self.extract(user_message, bot_response, user_id))
+            summary = tg.create_task(self.summarize(history))
+        return facts.result(), summary.result()
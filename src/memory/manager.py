@@ -1,5 +1,10 @@
 """Memory manager — recall and store user facts and summaries."""
 
+import asyncio
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import starmap
 from typing import Any, Optional
 
 import structlog
@@ -9,6 +14,80 @@ from .models import MemoryContext, UserFact
 
 logger = structlog.get_logger()
 
+# With summary batching on, buffered rows are written after this many seconds
+# or as soon as this many are pending, whichever comes first
+SUMMARY_FLUSH_DELAY = 0.2
+SUMMARY_BATCH_SIZE = 32
+
+# Number of users whose facts are kept in memory between recalls
+FACTS_CACHE_SIZE = 1024
+# Most recently updated facts loaded per user; more would not fit in a prompt
+MAX_USER_FACTS = 256
+
+# Significant words of a recall query: runs of more than three word characters
+_KEYWORD_RE = re.compile(r"\w{4,}")
+
+# Statements are module constants so each one is a single string object and
+# sqlite3's per-connection statement cache always hits after first use
+_SELECT_FACTS_SQL = """SELECT user_id, category, fact, source, confidence,
+    created_at, updated_at
+FROM user_memory WHERE user_id = ?
+ORDER BY updated_at DESC LIMIT ?"""
+
+_UPSERT_FACT_SQL = """INSERT INTO user_memory
+(user_id, category, fact, source, confidence)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(user_id, category, fact) DO UPDATE SET
+    confidence = excluded.confidence,
+    updated_at = CURRENT_TIMESTAMP"""
+
+# Keyword matches by relevance, topped up with the most recent other summaries
+_SEARCH_SUMMARIES_SQL = """WITH matched AS (
+    SELECT s.id, s.summary, s.created_at, conversation_summaries_fts.rank AS score
+    FROM conversation_summaries_fts
+    JOIN conversation_summaries s ON s.id = conversation_summaries_fts.rowid
+    WHERE conversation_summaries_fts MATCH ? AND s.user_id = ?
+),
+recent AS (
+    SELECT id, summary, created_at FROM conversation_summaries
+    WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+)
+SELECT summary FROM (
+    SELECT summary, created_at, 0 AS pri, score FROM matched
+    UNION ALL
+    SELECT summary, created_at, 1, 0 FROM recent
+    WHERE id NOT IN (SELECT id FROM matched)
+)
+ORDER BY pri, score, created_at DESC LIMIT ?"""
+
+_RECENT_SUMMARIES_SQL = """SELECT summary FROM conversation_summaries
+WHERE user_id = ? ORDER BY created_at DESC LIMIT ?"""
+
+_INSERT_SUMMARY_SQL = """INSERT INTO conversation_summaries
+(user_id, session_id, summary)
+VALUES (?, ?, ?)"""
+
+
+@lru_cache(maxsize=128)
+def _format_memory(
+    facts: tuple[tuple[str, str], ...], summaries: tuple[str, ...]
+) -> str:
+    """Render memory sections; cached since a user's memory rarely changes."""
+    # One flat list of lines; the empty element becomes the section break
+    parts: list[str] = []
+
+    if facts:
+        parts.append("Known facts about the user:")
+        parts.extend(starmap("- [{}] {}".format, facts))
+
+    if summaries:
+        if parts:
+            parts.append("")
+        parts.append("Recent conversation context:")
+        parts.extend(map("- {}".format, summaries))
+
+    return "\n".join(parts)
+
 
 class MemoryManager:
     """Manages persistent user memory: facts, summaries, working memory."""
@@ -17,14 +96,54 @@ class MemoryManager:
         self,
         db_manager: Any = None,
         extractor: Optional[FactExtractor] = None,
+        batch_summaries: bool = False,
     ) -> None:
         self._db = db_manager
         self._extractor = extractor or FactExtractor()
+        self._batch_summaries = batch_summaries
+        self._summary_buffer: list[tuple[int, Optional[str], str]] = []
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        # LRU of user_id -> facts; dropped whenever that user's facts are written
+        self._facts_cache: OrderedDict[int, list[UserFact]] = OrderedDict()
+        # user_id -> number of memory writes; a read that overlaps a write
+        # sees a changed count and does not cache what it fetched
+        self._writes: dict[int, int] = {}
+        # LRU of users found to have no facts or summaries; dropped on a write
+        self._empty_users: OrderedDict[int, None] = OrderedDict()
+        # Failed fact/summary lookups; an empty recall is only trusted when
+        # none happened while it ran
+        self._lookup_errors = 0
+
+    def clear_cache(self) -> None:
+        """Forget all cached user facts and known-empty users."""
+        self._facts_cache.clear()
+        self._empty_users.clear()
 
     async def recall(self, user_id: int, message: str = "") -> MemoryContext:
         """Retrieve relevant memories for a user."""
-        facts = await self._get_user_facts(user_id)
-        summaries = await self._search_summaries(user_id, message, limit=3)
+        if user_id in self._empty_users:
+            self._empty_users.move_to_end(user_id)
+            return MemoryContext()
+
+        writes = self._writes.get(user_id, 0)
+        errors = self._lookup_errors
+        # Each helper takes its own pooled connection, so the queries overlap
+        facts, summaries = await asyncio.gather(
+            self._get_user_facts(user_id),
+            self._search_summaries(user_id, message, limit=3),
+        )
+
+        # Only trust an empty result when both queries succeeded and no write
+        # for this user landed meanwhile
+        if (
+            not facts
+            and not summaries
+            and self._lookup_errors == errors
+            and self._writes.get(user_id, 0) == writes
+        ):
+            self._empty_users[user_id] = None
+            if len(self._empty_users) > FACTS_CACHE_SIZE:
+                self._empty_users.popitem(last=False)
 
         return MemoryContext(
             facts=facts,
@@ -42,8 +161,8 @@ class MemoryManager:
             return
 
         new_facts = await self._extractor.extract(message, response, user_id)
-        for fact in new_facts:
-            await self._upsert_fact(user_id, fact)
+        if new_facts:
+            await self._upsert_facts_bulk(user_id, new_facts)
 
     async def summarize_session(
         self,
@@ -61,19 +180,10 @@ class MemoryManager:
 
     def format_for_prompt(self, memory: MemoryContext) -> str:
         """Format memory context as text for system prompt injection."""
-        parts: list[str] = []
-
-        if memory.facts:
-            facts_text = "\n".join(
-                f"- [{f.category}] {f.fact}" for f in memory.facts
-            )
-            parts.append(f"Known facts about the user:\n{facts_text}")
-
-        if memory.summaries:
-            summaries_text = "\n".join(f"- {s}" for s in memory.summaries)
-            parts.append(f"Recent conversation context:\n{summaries_text}")
-
-        return "\n\n".join(parts)
+        return _format_memory(
+            tuple((f.category, f.fact) for f in memory.facts),
+            tuple(memory.summaries),
+        )
 
     # --- DB operations ---
 
@@ -82,74 +192,89 @@ class MemoryManager:
         if not self._db:
             return []
 
+        cached = self._facts_cache.get(user_id)
+        if cached is not None:
+            self._facts_cache.move_to_end(user_id)
+            return list(cached)
+
+        writes = self._writes.get(user_id, 0)
         try:
             async with self._db.get_connection() as conn:
+                # Columns follow UserFact field order so rows unpack positionally
                 cursor = await conn.execute(
-                    "SELECT * FROM user_memory WHERE user_id = ? ORDER BY updated_at DESC",
-                    (user_id,),
+                    _SELECT_FACTS_SQL, (user_id, MAX_USER_FACTS)
                 )
                 rows = await cursor.fetchall()
-                return [UserFact.from_row(dict(row)) for row in rows]
+                facts = [UserFact.from_tuple(row) for row in rows]
         except Exception as exc:
+            self._lookup_errors += 1
             logger.warning("Failed to fetch user facts", error=str(exc))
             return []
 
+        if self._writes.get(user_id, 0) != writes:
+            return facts
+
+        self._facts_cache[user_id] = facts
+        if len(self._facts_cache) > FACTS_CACHE_SIZE:
+            self._facts_cache.popitem(last=False)
+        return list(facts)
+
     async def _upsert_fact(self, user_id: int, fact: UserFact) -> None:
         """Insert or update a fact."""
+        await self._upsert_facts_bulk(user_id, [fact])
+
+    async def _upsert_facts_bulk(self, user_id: int, facts: list[UserFact]) -> None:
+        """Insert or update several facts in a single transaction."""
         if not self._db:
             return
 
         try:
             async with self._db.get_connection() as conn:
-                await conn.execute(
-                    """INSERT INTO user_memory (user_id, category, fact, source, confidence)
-                    VALUES (?, ?, ?, ?, ?)
-                    ON CONFLICT(user_id, category, fact) DO UPDATE SET
-                        confidence = excluded.confidence,
-                        updated_at = CURRENT_TIMESTAMP""",
-                    (user_id, fact.category, fact.fact, fact.source, fact.confidence),
+                await conn.executemany(
+                    _UPSERT_FACT_SQL,
+                    [
+                        (user_id, f.category, f.fact, f.source, f.confidence)
+                        for f in facts
+                    ],
                 )
                 await conn.commit()
         except Exception as exc:
-            logger.warning("Failed to upsert fact", error=str(exc))
+            logger.warning("Failed to upsert facts", error=str(exc))
+        finally:
+            self._facts_cache.pop(user_id, None)
+            self._note_write(user_id)
 
     async def _search_summaries(
         self, user_id: int, query: str, limit: int = 3
     ) -> list[str]:
-        """Search conversation summaries by keyword."""
+        """Search conversation summaries by keyword via the FTS5 index."""
         if not self._db:
             return []
 
         try:
             async with self._db.get_connection() as conn:
-                # Simple keyword search; LIKE is good enough for now
-                if query and len(query) > 5:
-                    # Extract first significant word
-                    words = [w for w in query.split() if len(w) > 3]
-                    if words:
-                        keyword = words[0]
-                        cursor = await conn.execute(
-                            """SELECT summary FROM conversation_summaries
-                            WHERE user_id = ? AND (summary LIKE ? OR key_topics LIKE ?)
-                            ORDER BY created_at DESC LIMIT ?""",
-                            (user_id, f"%{keyword}%", f"%{keyword}%", limit),
-                        )
-                        rows = await cursor.fetchall()
-                        if rows:
-                            return [row[0] for row in rows]
-
-                # Fallback: most recent summaries
-                cursor = await conn.execute(
-                    """SELECT summary FROM conversation_summaries
-                    WHERE user_id = ? ORDER BY created_at DESC LIMIT ?""",
-                    (user_id, limit),
-                )
+                match = self._build_match_query(query)
+                if match:
+                    cursor = await conn.execute(
+                        _SEARCH_SUMMARIES_SQL, (match, user_id, user_id, limit, limit)
+                    )
+                else:
+                    cursor = await conn.execute(_RECENT_SUMMARIES_SQL, (user_id, limit))
                 rows = await cursor.fetchall()
                 return [row[0] for row in rows]
         except Exception as exc:
+            self._lookup_errors += 1
             logger.warning("Failed to search summaries", error=str(exc))
             return []
 
+    @staticmethod
+    def _build_match_query(query: str) -> str:
+        """Build an FTS5 OR-query from significant words ('' if too short)."""
+        if not query or len(query) <= 5:
+            return ""
+        # Quote every word so FTS5 keywords such as NEAR/AND are taken literally
+        return " OR ".join(f'"{w}"' for w in _KEYWORD_RE.findall(query))
+
     async def _store_summary(
         self, user_id: int, summary: str, session_id: Optional[str] = None
     ) -> None:
@@ -157,14 +282,52 @@ class MemoryManager:
         if not self._db:
             return
 
+        self._note_write(user_id)
+        if self._batch_summaries:
+            self._summary_buffer.append((user_id, session_id, summary))
+            if len(self._summary_buffer) >= SUMMARY_BATCH_SIZE:
+                await self.flush()
+            elif self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+            return
+
         try:
             async with self._db.get_connection() as conn:
-                await conn.execute(
-                    """INSERT INTO conversation_summaries
-                    (user_id, session_id, summary)
-                    VALUES (?, ?, ?)""",
-                    (user_id, session_id, summary),
-                )
+                await conn.execute(_INSERT_SUMMARY_SQL, (user_id, session_id, summary))
                 await conn.commit()
         except Exception as exc:
             logger.warning("Failed to store summary", error=str(exc))
+        finally:
+            self._note_write(user_id)
+
+    def _note_write(self, user_id: int) -> None:
+        """Invalidate in-flight reads and the known-empty mark for a user."""
+        self._writes[user_id] = self._writes.get(user_id, 0) + 1
+        self._empty_users.pop(user_id, None)
+
+    async def _flush_later(self) -> None:
+        """Flush buffered summaries once the batching window closes."""
+        await asyncio.sleep(SUMMARY_FLUSH_DELAY)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered summaries in a single transaction."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        if not self._summary_buffer or not self._db:
+            return
+
+        rows, self._summary_buffer = self._summary_buffer, []
+        try:
+            async with self._db.get_connection() as conn:
+                await conn.executemany(_INSERT_SUMMARY_SQL, rows)
+                await conn.commit()
+        except Exception as exc:
+            logger.warning("Failed to store summaries", count=len(rows), error=str(exc))
+        finally:
+            # A recall between buffering and this commit may have seen no rows
+            for user_id, _, _ in rows:
+                self._note_write(user_id)
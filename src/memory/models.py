@@ -2,10 +2,10 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Iterable, Optional, Sequence
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UserFact:
     """A persistent fact about a user."""
 
@@ -30,8 +30,13 @@ class UserFact:
             updated_at=row.get("updated_at"),
         )
 
+    @classmethod
+    def from_tuple(cls, row: Sequence[Any]) -> "UserFact":
+        """Create from a positional row whose columns follow the field order."""
+        return cls(*row)
+
 
-@dataclass
+@dataclass(slots=True)
 class ConversationSummary:
     """Compressed summary of a past conversation session."""
 
@@ -42,10 +47,36 @@ class ConversationSummary:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class Message:
+    """A single working-memory turn."""
+
+    role: str
+    content: str
+
+    def as_dict(self) -> dict[str, str]:
+        """Serialize to the role/content mapping used in LLM prompts."""
+        return {"role": self.role, "content": self.content}
+
+
+@dataclass(slots=True, frozen=True)
 class MemoryContext:
     """Aggregated memory context for prompt injection."""
 
     facts: list[UserFact] = field(default_factory=list)
     summaries: list[str] = field(default_factory=list)
-    working_memory: list[dict[str, str]] = field(default_factory=list)
+    working_memory: list[Message] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(
+        cls,
+        fact_rows: Iterable[Sequence[Any]],
+        summary_rows: Iterable[Sequence[Any]] = (),
+        working_memory: Iterable[Message] = (),
+    ) -> "MemoryContext":
+        """Create from raw cursor rows in a single pass per source."""
+        return cls(
+            facts=[UserFact.from_tuple(row) for row in fact_rows],
+            summaries=[row[0] for row in summary_rows],
+            working_memory=list(working_memory),
+        )
@@ -9,6 +9,7 @@ Features:
 
 import asyncio
 import sqlite3
+import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
@@ -140,9 +141,19 @@ class DatabaseManager:
     def __init__(self, database_url: str):
         """Initialize database manager."""
         self.database_path = self._parse_database_url(database_url)
-        self._connection_pool = []
+        self._in_memory = str(self.database_path) == ":memory:"
+        # A plain ":memory:" gives every connection its own empty database; a
+        # named shared-cache URI lets all pooled connections see the same one.
+        self._connect_target = (
+            f"file:memdb-{uuid.uuid4().hex}?mode=memory&cache=shared"
+            if self._in_memory
+            else str(self.database_path)
+        )
         self._pool_size = 5
-        self._pool_lock = asyncio.Lock()
+        # LIFO keeps handing out the most recently used (warm) connection
+        self._connection_pool: asyncio.LifoQueue[aiosqlite.Connection] = (
+            asyncio.LifoQueue(maxsize=self._pool_size)
+        )
 
     def _parse_database_url(self, database_url: str) -> Path:
         """Parse database URL to path."""
@@ -158,26 +169,21 @@ class DatabaseManager:
         logger.info("Initializing database", path=str(self.database_path))
 
         # Ensure directory exists
-        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._in_memory:
+            self.database_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Open the pool first: an in-memory database lives only as long as
+        # one of its connections stays open
+        await self._init_pool()
 
         # Run migrations
         await self._run_migrations()
 
-        # Initialize connection pool
-        await self._init_pool()
-
         logger.info("Database initialization complete")
 
     async def _run_migrations(self):
         """Run database migrations."""
-        async with aiosqlite.connect(
-            self.database_path, detect_types=sqlite3.PARSE_DECLTYPES
-        ) as conn:
-            conn.row_factory = aiosqlite.Row
-
-            # Enable foreign keys
-            await conn.execute("PRAGMA foreign_keys = ON")
-
+        async with self.get_connection() as conn:
             # Get current version
             current_version = await self._get_schema_version(conn)
             logger.info("Current schema version", version=current_version)
@@ -420,51 +426,115 @@ class DatabaseManager:
                 );
                 """,
             ),
+            (
+                8,
+                """
+                -- Full-text index over conversation summaries for memory recall
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversation_summaries_fts
+                    USING fts5(
+                        summary,
+                        key_topics,
+                        content='conversation_summaries',
+                        content_rowid='id'
+                    );
+
+                CREATE TRIGGER IF NOT EXISTS conversation_summaries_ai
+                AFTER INSERT ON conversation_summaries BEGIN
+                    INSERT INTO conversation_summaries_fts(rowid, summary, key_topics)
+                    VALUES (new.id, new.summary, new.key_topics);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS conversation_summaries_ad
+                AFTER DELETE ON conversation_summaries BEGIN
+                    INSERT INTO conversation_summaries_fts(
+                        conversation_summaries_fts, rowid, summary, key_topics
+                    ) VALUES ('delete', old.id, old.summary, old.key_topics);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS conversation_summaries_au
+                AFTER UPDATE ON conversation_summaries BEGIN
+                    INSERT INTO conversation_summaries_fts(
+                        conversation_summaries_fts, rowid, summary, key_topics
+                    ) VALUES ('delete', old.id, old.summary, old.key_topics);
+                    INSERT INTO conversation_summaries_fts(rowid, summary, key_topics)
+                    VALUES (new.id, new.summary, new.key_topics);
+                END;
+
+                -- Index summaries stored before this migration
+                INSERT INTO conversation_summaries_fts(conversation_summaries_fts)
+                VALUES ('rebuild');
+                """,
+            ),
+            (
+                9,
+                """
+                -- Per-project task lookups; these supersede the
+                -- project_path-only index. The partial index's WHERE must
+                -- match TaskRepository's last-finished query for SQLite to
+                -- use it and skip sorting.
+                CREATE INDEX IF NOT EXISTS idx_tasks_project_status
+                    ON background_tasks(project_path, status);
+                CREATE INDEX IF NOT EXISTS idx_tasks_project_finished
+                    ON background_tasks(project_path, finished_at DESC)
+                    WHERE status IN ('completed', 'failed');
+                DROP INDEX IF EXISTS idx_bg_tasks_project;
+                """,
+            ),
         ]
 
     async def _init_pool(self):
         """Initialize connection pool."""
         logger.info("Initializing connection pool", size=self._pool_size)
 
-        async with self._pool_lock:
-            for _ in range(self._pool_size):
-                conn = await aiosqlite.connect(
-                    self.database_path, detect_types=sqlite3.PARSE_DECLTYPES
-                )
-                conn.row_factory = aiosqlite.Row
-                await conn.execute("PRAGMA foreign_keys = ON")
-                self._connection_pool.append(conn)
+        for _ in range(self._pool_size):
+            self._connection_pool.put_nowait(await self._connect())
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a configured connection to the database."""
+        conn = await aiosqlite.connect(
+            self._connect_target, detect_types=sqlite3.PARSE_DECLTYPES, uri=True
+        )
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA foreign_keys = ON")
+        # WAL (set persistently by migration 3) with synchronous=NORMAL skips the
+        # fsync on each commit; a crash can lose the last commits, never corrupt.
+        await conn.execute("PRAGMA journal_mode = WAL")
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+        await conn.execute("PRAGMA mmap_size = 268435456")
+        # Wait on locks instead of failing
+        await conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
 
     @asynccontextmanager
     async def get_connection(self) -> AsyncIterator[aiosqlite.Connection]:
         """Get database connection from pool."""
-        async with self._pool_lock:
-            if self._connection_pool:
-                conn = self._connection_pool.pop()
-            else:
-                conn = await aiosqlite.connect(
-                    self.database_path, detect_types=sqlite3.PARSE_DECLTYPES
-                )
-                conn.row_factory = aiosqlite.Row
-                await conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            conn = self._connection_pool.get_nowait()
+        except asyncio.QueueEmpty:
+            # Pool exhausted; open an overflow connection rather than wait
+            conn = await self._connect()
 
         try:
             yield conn
+        except BaseException:
+            # Never hand a connection with an open transaction back to the
+            # pool; it would hold the write lock for every later user
+            if conn.in_transaction:
+                await conn.rollback()
+            raise
         finally:
-            async with self._pool_lock:
-                if len(self._connection_pool) < self._pool_size:
-                    self._connection_pool.append(conn)
-                else:
-                    await conn.close()
+            try:
+                self._connection_pool.put_nowait(conn)
+            except asyncio.QueueFull:
+                await conn.close()
 
     async def close(self):
         """Close all connections in pool."""
         logger.info("Closing database connections")
 
-        async with self._pool_lock:
-            for conn in self._connection_pool:
-                await conn.close()
-            self._connection_pool.clear()
+        while not self._connection_pool.empty():
+            await self._connection_pool.get_nowait().close()
 
     async def health_check(self) -> bool:
         """Check database health."""
@@ -2,24 +2,30 @@
 
 import asyncio
 import logging
-import re
+import sys
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from src.events.types import TaskProgressEvent, TaskTimeoutEvent
 
 logger = logging.getLogger(__name__)
 
-# Stage detection patterns from Claude Code output
-STAGE_PATTERNS = [
-    (re.compile(r"Read|Glob|Grep|searching", re.I), "исследует код"),
-    (re.compile(r"Write|Edit|creating file", re.I), "пишет код"),
-    (re.compile(r"pytest|npm test|jest|make test", re.I), "запускает тесты"),
-    (re.compile(r"git commit|git push", re.I), "коммитит"),
-    (re.compile(r"thinking|planning|analyzing", re.I), "планирует"),
-    (re.compile(r"pip install|npm install|poetry", re.I), "устанавливает зависимости"),
+# Stage detection keywords from Claude Code output, in priority order. They
+# are lowercase: parse_stage lowercases the output once and scans it for each
+# keyword with ``in``, which is far cheaper than case-insensitive regexes.
+STAGE_KEYWORDS = [
+    (("read", "glob", "grep", "searching"), "исследует код"),
+    (("write", "edit", "creating file"), "пишет код"),
+    (("pytest", "npm test", "jest", "make test"), "запускает тесты"),
+    (("git commit", "git push"), "коммитит"),
+    (("thinking", "planning", "analyzing"), "планирует"),
+    (("pip install", "npm install", "poetry"), "устанавливает зависимости"),
 ]
 
+# Labels are interned so callers can compare returned stages by identity
+_STAGES = tuple((keywords, sys.intern(label)) for keywords, label in STAGE_KEYWORDS)
+DEFAULT_STAGE = sys.intern("работает")
+
 
 class HeartbeatService:
     """Sends periodic progress updates for running background tasks."""
@@ -56,9 +62,17 @@ class HeartbeatService:
                 pass
 
     async def stop_all(self) -> None:
-        """Stop all heartbeat loops."""
-        for task_id in list(self._tasks.keys()):
-            await self.stop(task_id)
+        """Stop all heartbeat loops, cancelling them concurrently."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for t in tasks:
+            t.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for t, result in zip(tasks, results):
+            if isinstance(result, BaseException) and not isinstance(
+                result, asyncio.CancelledError
+            ):
+                logger.error("%s failed while stopping", t.get_name(), exc_info=result)
 
     async def _loop(self, task_id: str) -> None:
         """Heartbeat loop: check task, emit progress or timeout."""
@@ -107,11 +121,22 @@ class HeartbeatService:
             self._tasks.pop(task_id, None)
 
     @staticmethod
-    def parse_stage(last_output: Optional[str]) -> str:
-        """Determine current stage from Claude output keywords."""
+    def parse_stage(
+        last_output: Optional[str],
+        *,
+        _stages: Tuple[Tuple[Tuple[str, ...], str], ...] = _STAGES,
+        _default: str = DEFAULT_STAGE,
+    ) -> str:
+        """Determine current stage from Claude output keywords.
+
+        The keyword-only defaults bind module constants as locals; they are
+        not part of the public signature.
+        """
         if not last_output:
-            return "работает"
-        for pattern, stage in STAGE_PATTERNS:
-            if pattern.search(last_output):
-                return stage
-        return "работает"
+            return _default
+        text = last_output.lower()
+        for keywords, label in _stages:
+            for keyword in keywords:
+                if keyword in text:
+                    return label
+        return _default
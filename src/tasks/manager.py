@@ -24,7 +24,10 @@ from .repository import TaskRepository
 
 logger = structlog.get_logger()
 
-RETRY_DELAY_SECONDS = 30
+
+def _now() -> datetime:
+    """Current UTC time; a single seam for tests to freeze the clock."""
+    return datetime.now(timezone.utc)
 
 
 class CostLimitExceeded(Exception):
@@ -227,9 +230,10 @@ class TaskManager:
         4. Always: stop heartbeat, remove from running tasks
         """
         task_id = task.task_id
-        start_time = datetime.now(timezone.utc)
+        start_time = _now()
         accumulated_cost = 0.0
         cost_limit = self._settings.task_max_cost
+        retry_delay = self._settings.task_retry_delay_seconds
         last_error: Optional[Exception] = None
 
         for attempt in range(2):  # max 2 attempts (initial + 1 retry)
@@ -240,7 +244,8 @@ class TaskManager:
                         task_id=task_id,
                         attempt=attempt + 1,
                     )
-                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+                    if retry_delay:
+                        await asyncio.sleep(retry_delay)
 
                 # Define the stream callback for progress tracking
                 async def stream_callback(event: Any) -> None:
@@ -302,9 +307,7 @@ class TaskManager:
                 )
 
                 # Publish completion event
-                duration = int(
-                    (datetime.now(timezone.utc) - start_time).total_seconds()
-                )
+                duration = int((_now() - start_time).total_seconds())
                 await self._event_bus.publish(
                     TaskCompletedEvent(
                         task_id=task_id,
@@ -339,9 +342,7 @@ class TaskManager:
                     cost=exc.cost,
                     limit=exc.limit,
                 )
-                duration = int(
-                    (datetime.now(timezone.utc) - start_time).total_seconds()
-                )
+                duration = int((_now() - start_time).total_seconds())
                 await self._repo.update_status(
                     task_id,
                     "failed",
@@ -372,9 +373,7 @@ class TaskManager:
 
         # All attempts exhausted — mark as failed
         if last_error is not None:
-            duration = int(
-                (datetime.now(timezone.utc) - start_time).total_seconds()
-            )
+            duration = int((_now() - start_time).total_seconds())
             error_msg = str(last_error)
             await self._repo.update_status(
                 task_id,
@@ -3,7 +3,7 @@
 import json
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 import structlog
 
@@ -17,6 +17,40 @@ logger = structlog.get_logger()
 class TaskRepository:
     """Background task data access."""
 
+    _INSERT_SQL = """
+        INSERT INTO background_tasks (
+            task_id, user_id, project_path, prompt, status,
+            session_id, provider, created_at, finished_at,
+            total_cost, total_turns, last_output, last_activity_at,
+            result_summary, error_message, commits_json,
+            chat_id, message_thread_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+
+    _UPDATE_PROGRESS_SQL = """
+        UPDATE background_tasks
+        SET total_cost = ROUND(total_cost + ?, 6),
+            total_turns = total_turns + 1,
+            last_output = ?,
+            last_activity_at = ?
+        WHERE task_id = ?
+        """
+
+    _RUNNING_FOR_PROJECT_SQL = """
+        SELECT * FROM background_tasks
+        WHERE project_path = ? AND status = 'running'
+        LIMIT 1
+        """
+
+    # The status filter must stay identical to the WHERE clause of the
+    # idx_tasks_project_finished partial index (migration 9)
+    _LAST_COMPLETED_SQL = """
+        SELECT * FROM background_tasks
+        WHERE project_path = ? AND status IN ('completed', 'failed')
+        ORDER BY finished_at DESC
+        LIMIT 1
+        """
+
     def __init__(self, db_manager: DatabaseManager):
         """Initialize repository."""
         self.db = db_manager
@@ -24,40 +58,48 @@ class TaskRepository:
     async def create(self, task: BackgroundTask) -> None:
         """Insert a new background task."""
         async with self.db.get_connection() as conn:
-            await conn.execute(
-                """
-                INSERT INTO background_tasks (
-                    task_id, user_id, project_path, prompt, status,
-                    session_id, provider, created_at, finished_at,
-                    total_cost, total_turns, last_output, last_activity_at,
-                    result_summary, error_message, commits_json,
-                    chat_id, message_thread_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    task.task_id,
-                    task.user_id,
-                    str(task.project_path),
-                    task.prompt,
-                    task.status,
-                    task.session_id,
-                    task.provider,
-                    task.created_at,
-                    task.finished_at,
-                    task.total_cost,
-                    task.total_turns,
-                    task.last_output,
-                    task.last_activity_at,
-                    task.result_summary,
-                    task.error_message,
-                    json.dumps(task.commits),
-                    task.chat_id,
-                    task.message_thread_id,
-                ),
-            )
+            await conn.execute(self._INSERT_SQL, self._insert_params(task))
             await conn.commit()
             logger.info("Created background task", task_id=task.task_id)
 
+    async def create_many(self, tasks: Sequence[BackgroundTask]) -> None:
+        """Insert several background tasks in a single transaction.
+
+        Rows are bound one at a time by executemany, so SQLite's limit on
+        host parameters applies per task (18 columns), not to the batch.
+        """
+        async with self.db.get_connection() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            await conn.executemany(
+                self._INSERT_SQL, [self._insert_params(task) for task in tasks]
+            )
+            await conn.commit()
+            logger.info("Created background tasks", count=len(tasks))
+
+    @staticmethod
+    def _insert_params(task: BackgroundTask) -> tuple:
+        """Build the INSERT parameters for a task."""
+        return (
+            task.task_id,
+            task.user_id,
+            str(task.project_path),
+            task.prompt,
+            task.status,
+            task.session_id,
+            task.provider,
+            task.created_at,
+            task.finished_at,
+            task.total_cost,
+            task.total_turns,
+            task.last_output,
+            task.last_activity_at,
+            task.result_summary,
+            task.error_message,
+            json.dumps(task.commits),
+            task.chat_id,
+            task.message_thread_id,
+        )
+
     async def get(self, task_id: str) -> Optional[BackgroundTask]:
         """Get a background task by ID."""
         async with self.db.get_connection() as conn:
@@ -119,19 +161,15 @@ class TaskRepository:
         cost: float,
         last_output: Optional[str] = None,
     ) -> None:
-        """Update task progress (cost accumulation and last output)."""
+        """Update task progress (cost accumulation and last output).
+
+        The running cost is rounded to micro-dollars so repeated additions
+        do not accumulate floating point drift.
+        """
         now = datetime.now(timezone.utc)
         async with self.db.get_connection() as conn:
             await conn.execute(
-                """
-                UPDATE background_tasks
-                SET total_cost = total_cost + ?,
-                    total_turns = total_turns + 1,
-                    last_output = ?,
-                    last_activity_at = ?
-                WHERE task_id = ?
-                """,
-                (cost, last_output, now, task_id),
+                self._UPDATE_PROGRESS_SQL, (cost, last_output, now, task_id)
             )
             await conn.commit()
 
@@ -141,12 +179,7 @@ class TaskRepository:
         """Get running task for a specific project, if any."""
         async with self.db.get_connection() as conn:
             cursor = await conn.execute(
-                """
-                SELECT * FROM background_tasks
-                WHERE project_path = ? AND status = 'running'
-                LIMIT 1
-                """,
-                (str(project_path),),
+                self._RUNNING_FOR_PROJECT_SQL, (str(project_path),)
             )
             row = await cursor.fetchone()
             return BackgroundTask.from_row(row) if row else None
@@ -174,14 +207,6 @@ class TaskRepository:
     ) -> Optional[BackgroundTask]:
         """Get the most recently finished task for a project (completed or failed)."""
         async with self.db.get_connection() as conn:
-            cursor = await conn.execute(
-                """
-                SELECT * FROM background_tasks
-                WHERE project_path = ? AND status IN ('completed', 'failed')
-                ORDER BY finished_at DESC
-                LIMIT 1
-                """,
-                (str(project_path),),
-            )
+            cursor = await conn.execute(self._LAST_COMPLETED_SQL, (str(project_path),))
             row = await cursor.fetchone()
             return BackgroundTask.from_row(row) if row else None
@@ -2,7 +2,7 @@
 
 import asyncio
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -58,6 +58,7 @@ def settings():
     s.max_concurrent_tasks = 3
     s.task_max_cost = 10.0
     s.task_max_duration_seconds = 3600
+    s.task_retry_delay_seconds = 0.1
     return s
 
 
@@ -128,7 +129,6 @@ async def test_full_task_lifecycle(db, event_bus, mock_provider, settings, tmp_p
 
 
 @pytest.mark.asyncio
-@patch("src.tasks.manager.RETRY_DELAY_SECONDS", 0.1)
 async def test_task_error_handling(db, event_bus, settings, tmp_path):
     """Test: task fails -> marked as failed -> TaskFailedEvent emitted."""
     from src.events.types import TaskFailedEvent
@@ -175,7 +175,7 @@ async def test_task_error_handling(db, event_bus, settings, tmp_path):
         chat_id=100,
     )
 
-    # Wait for task to fail (retry delay is patched to 0.1s)
+    # Wait for task to fail (retry delay is set to 0.1s in settings)
     for _ in range(30):
         await asyncio.sleep(0.1)
         task = await repo.get(task_id)
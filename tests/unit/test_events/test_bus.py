@@ -150,3 +150,18 @@ class TestEventBus:
         await bus.start()
         await bus.stop()
         await bus.stop()  # Should not raise
+
+    def test_handler_count(self) -> None:
+        """handler_count reports per-type subscriptions, excluding globals."""
+        bus = EventBus()
+
+        async def handler(event: Event) -> None:
+            pass
+
+        assert bus.handler_count(BusTestEvent) == 0
+        bus.subscribe(BusTestEvent, handler)
+        bus.subscribe(BusTestEvent, handler)
+        bus.subscribe_all(handler)
+
+        assert bus.handler_count(BusTestEvent) == 2
+        assert bus.handler_count(OtherEvent) == 0
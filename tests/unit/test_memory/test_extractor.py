@@ -1,7 +1,11 @@
 """Test FactExtractor — LLM-based fact extraction and summarization."""
 
+import asyncio
 import json
-from unittest.mock import AsyncMock, MagicMock
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
 
 import pytest
 
@@ -9,6 +13,47 @@ from src.memory.extractor import EXTRACT_FACTS_SYSTEM, SUMMARIZE_SYSTEM, FactExt
 from src.memory.models import UserFact
 
 
+class _StubProvider:
+    """Minimal chat provider stub that records classify/chat calls."""
+
+    def __init__(self) -> None:
+        self.classify_return: Any = "[]"
+        # Exception to raise, or a list of return values/exceptions consumed in order
+        self.classify_side_effect: Any = None
+        self.chat_return = "Summary"
+        self.chat_side_effect: Exception | None = None
+        self.classify_calls = 0
+        self.chat_calls = 0
+        self.last_kwargs: dict[str, Any] = {}
+        self.delay = 0.0
+
+    async def classify(self, **kwargs: Any) -> Any:
+        self.classify_calls += 1
+        self.last_kwargs = kwargs
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        effect = self.classify_side_effect
+        if isinstance(effect, list):
+            effect = effect.pop(0)
+        if isinstance(effect, Exception):
+            raise effect
+        return self.classify_return if effect is None else effect
+
+    async def chat(self, **kwargs: Any) -> SimpleNamespace:
+        self.chat_calls += 1
+        self.last_kwargs = kwargs
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.chat_side_effect is not None:
+            raise self.chat_side_effect
+        return SimpleNamespace(content=self.chat_return)
+
+
+@pytest.fixture
+def stub_provider() -> _StubProvider:
+    return _StubProvider()
+
+
 class TestFactExtractor:
     """Test FactExtractor for fact extraction and conversation summarization."""
 
@@ -17,11 +62,10 @@ class TestFactExtractor:
         extractor = FactExtractor()
         assert extractor._provider is None
 
-    def test_construction_with_provider(self) -> None:
+    def test_construction_with_provider(self, stub_provider: _StubProvider) -> None:
         """Test FactExtractor can be created with a chat provider."""
-        provider = MagicMock()
-        extractor = FactExtractor(chat_provider=provider)
-        assert extractor._provider is provider
+        extractor = FactExtractor(chat_provider=stub_provider)
+        assert extractor._provider is stub_provider
 
     async def test_extract_returns_empty_when_no_provider(self) -> None:
         """Test extract() returns empty list when no provider is configured."""
@@ -33,10 +77,11 @@ class TestFactExtractor:
         )
         assert facts == []
 
-    async def test_extract_returns_empty_when_messages_too_short(self) -> None:
+    async def test_extract_returns_empty_when_messages_too_short(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() returns empty list when both messages are too short."""
-        provider = MagicMock()
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         # Both messages < 10 chars
         facts = await extractor.extract(
@@ -45,6 +90,7 @@ class TestFactExtractor:
             user_id=123,
         )
         assert facts == []
+        assert stub_provider.classify_calls == 0
 
         # User message >= 10 but bot response < 10
         facts = await extractor.extract(
@@ -62,19 +108,18 @@ class TestFactExtractor:
         )
         assert facts == []
 
-    async def test_extract_parses_valid_json_array(self) -> None:
+    async def test_extract_parses_valid_json_array(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() successfully parses valid JSON array from provider."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(
-            return_value=json.dumps(
-                [
-                    {"category": "preference", "fact": "likes Python"},
-                    {"category": "work", "fact": "works as software engineer"},
-                ]
-            )
+        stub_provider.classify_return = json.dumps(
+            [
+                {"category": "preference", "fact": "likes Python"},
+                {"category": "work", "fact": "works as software engineer"},
+            ]
         )
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I love Python and I work as a software engineer",
             bot_response="That's wonderful! Python is great for software development.",
@@ -91,17 +136,36 @@ class TestFactExtractor:
         assert facts[1].source == "auto_extract"
 
         # Verify provider was called with correct arguments
-        provider.classify.assert_called_once()
-        call_args = provider.classify.call_args
-        assert "system" in call_args.kwargs
-        assert call_args.kwargs["system"] == EXTRACT_FACTS_SYSTEM
+        assert stub_provider.classify_calls == 1
+        assert "system" in stub_provider.last_kwargs
+        assert stub_provider.last_kwargs["system"] == EXTRACT_FACTS_SYSTEM
+
+    @pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+    async def test_extract_parses_str_and_bytes_responses(
+        self, stub_provider: _StubProvider, as_bytes: bool
+    ) -> None:
+        """Test extract() parses provider responses given as str or raw bytes."""
+        payload = json.dumps([{"category": "technical", "fact": "uses Neovim"}])
+        stub_provider.classify_return = payload.encode() if as_bytes else payload
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        facts = await extractor.extract(
+            user_message="I write all my code in Neovim",
+            bot_response="Neovim is a great editor!",
+            user_id=321,
+        )
 
-    async def test_extract_handles_invalid_json(self) -> None:
+        assert len(facts) == 1
+        assert facts[0].category == "technical"
+        assert facts[0].fact == "uses Neovim"
+
+    async def test_extract_handles_invalid_json(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() handles invalid JSON gracefully."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(return_value="not valid json {")
+        stub_provider.classify_return = "not valid json {"
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I like to code in Python",
             bot_response="Python is a great language!",
@@ -110,14 +174,15 @@ class TestFactExtractor:
 
         assert facts == []
 
-    async def test_extract_handles_non_list_json(self) -> None:
+    async def test_extract_handles_non_list_json(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() returns empty list when JSON is not a list."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(
-            return_value=json.dumps({"category": "preference", "fact": "likes Python"})
+        stub_provider.classify_return = json.dumps(
+            {"category": "preference", "fact": "likes Python"}
         )
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I like Python",
             bot_response="Great choice!",
@@ -126,20 +191,19 @@ class TestFactExtractor:
 
         assert facts == []
 
-    async def test_extract_handles_items_missing_category(self) -> None:
+    async def test_extract_handles_items_missing_category(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() skips items missing category field."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(
-            return_value=json.dumps(
-                [
-                    {"category": "preference", "fact": "likes Python"},
-                    {"fact": "missing category field"},  # no category
-                    {"category": "work", "fact": "software engineer"},
-                ]
-            )
+        stub_provider.classify_return = json.dumps(
+            [
+                {"category": "preference", "fact": "likes Python"},
+                {"fact": "missing category field"},  # no category
+                {"category": "work", "fact": "software engineer"},
+            ]
         )
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I love Python and work as an engineer",
             bot_response="Excellent!",
@@ -151,20 +215,19 @@ class TestFactExtractor:
         assert facts[0].fact == "likes Python"
         assert facts[1].fact == "software engineer"
 
-    async def test_extract_handles_items_missing_fact(self) -> None:
+    async def test_extract_handles_items_missing_fact(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() skips items missing fact field."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(
-            return_value=json.dumps(
-                [
-                    {"category": "preference", "fact": "likes Python"},
-                    {"category": "personal"},  # no fact
-                    {"category": "work", "fact": "software engineer"},
-                ]
-            )
+        stub_provider.classify_return = json.dumps(
+            [
+                {"category": "preference", "fact": "likes Python"},
+                {"category": "personal"},  # no fact
+                {"category": "work", "fact": "software engineer"},
+            ]
         )
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I love Python and work as an engineer",
             bot_response="Excellent!",
@@ -175,21 +238,20 @@ class TestFactExtractor:
         assert facts[0].fact == "likes Python"
         assert facts[1].fact == "software engineer"
 
-    async def test_extract_handles_non_dict_items(self) -> None:
+    async def test_extract_handles_non_dict_items(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() skips non-dict items in the array."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(
-            return_value=json.dumps(
-                [
-                    {"category": "preference", "fact": "likes Python"},
-                    "not a dict",
-                    123,
-                    {"category": "work", "fact": "software engineer"},
-                ]
-            )
+        stub_provider.classify_return = json.dumps(
+            [
+                {"category": "preference", "fact": "likes Python"},
+                "not a dict",
+                123,
+                {"category": "work", "fact": "software engineer"},
+            ]
         )
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I love Python and work as an engineer",
             bot_response="Excellent!",
@@ -200,12 +262,108 @@ class TestFactExtractor:
         assert facts[0].fact == "likes Python"
         assert facts[1].fact == "software engineer"
 
-    async def test_extract_truncates_long_messages(self) -> None:
-        """Test extract() truncates messages to 500 characters."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(return_value="[]")
+    async def test_extract_skips_items_with_non_string_fields(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test extract() drops items with non-string fields, ignoring extra keys."""
+        stub_provider.classify_return = json.dumps(
+            [
+                {"category": "preference", "fact": "likes Python", "extra": 1},
+                {"category": "work", "fact": 42},
+                {"category": None, "fact": "no category"},
+            ]
+        )
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        facts = await extractor.extract(
+            user_message="I love Python and work as an engineer",
+            bot_response="Excellent!",
+            user_id=301,
+        )
+
+        assert len(facts) == 1
+        assert facts[0].category == "preference"
+        assert facts[0].fact == "likes Python"
+
+    async def test_extract_large_response_does_not_materialize_unused_keys(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test extract() keeps peak memory far below a ~1 MB response size."""
+        noise = {f"note_{i}": "x" * 1000 for i in range(500)}
+        payload = json.dumps(
+            [
+                {"category": "work", "fact": "backend engineer", **noise},
+                {"category": "location", "fact": "lives in Berlin", **noise},
+            ]
+        )
+        stub_provider.classify_return = payload
+        extractor = FactExtractor(chat_provider=stub_provider)
+
+        tracemalloc.start()
+        try:
+            facts = await extractor.extract(
+                user_message="I am a backend engineer living in Berlin",
+                bot_response="Berlin has a great tech scene!",
+                user_id=302,
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(payload) > 1_000_000
+        assert [f.fact for f in facts] == ["backend engineer", "lives in Berlin"]
+        assert peak < 100_000
+
+    async def test_extract_reuses_module_fact_adapter(
+        self, stub_provider: _StubProvider, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test extract() validates with the import-time adapter, not a new one."""
+
+        def _fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("TypeAdapter built per call")
+
+        monkeypatch.setattr("src.memory.extractor.TypeAdapter", _fail)
+        stub_provider.classify_return = json.dumps(
+            [{"category": "technical", "fact": "uses Rust"}]
+        )
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        first = await extractor.extract("I write services in Rust", "Nice!", 1)
+        second = await extractor.extract("I also write CLIs in Rust", "Cool!", 1)
+
+        assert [f.fact for f in first] == [f.fact for f in second] == ["uses Rust"]
+        assert stub_provider.classify_calls == 2
+
+    @pytest.mark.parametrize("reply", ["  []  ", b"[]\n"], ids=["str", "bytes"])
+    async def test_extract_fast_path_empty_array(
+        self,
+        stub_provider: _StubProvider,
+        monkeypatch: pytest.MonkeyPatch,
+        reply: Any,
+    ) -> None:
+        """Test an empty-array reply is handled without invoking the parser."""
 
-        extractor = FactExtractor(chat_provider=provider)
+        class _FailingAdapter:
+            def validate_json(self, data: Any) -> None:
+                raise AssertionError("parser invoked for empty reply")
+
+        monkeypatch.setattr(
+            "src.memory.extractor._FACT_LIST_ADAPTER", _FailingAdapter()
+        )
+        stub_provider.classify_return = reply
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        facts = await extractor.extract("Just chatting about nothing", "Sure!", 1)
+        again = await extractor.extract("Just chatting about nothing", "Sure!", 1)
+
+        assert facts == again == []
+        assert stub_provider.classify_calls == 1
+
+    async def test_extract_truncates_long_messages(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test extract() truncates messages to 500 characters."""
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         long_message = "a" * 1000
         long_response = "b" * 1000
@@ -217,16 +375,77 @@ class TestFactExtractor:
         )
 
         # Verify the exchange passed to provider was truncated
-        call_args = provider.classify.call_args
-        exchange = call_args.kwargs["prompt"]
+        exchange = stub_provider.last_kwargs["prompt"]
         assert len(exchange) < 1100  # "User: " + 500 + "\nAssistant: " + 500
 
-    async def test_extract_handles_exception_from_provider(self) -> None:
+    async def test_extract_uses_cache_on_repeat_call(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test extract() serves an identical exchange from cache."""
+        stub_provider.classify_return = json.dumps(
+            [{"category": "preference", "fact": "likes tea"}]
+        )
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        first = await extractor.extract("I really like green tea", "Nice choice!", 1)
+        second = await extractor.extract("I really like green tea", "Nice choice!", 1)
+
+        assert stub_provider.classify_calls == 1
+        assert [f.fact for f in second] == [f.fact for f in first] == ["likes tea"]
+        assert second[0] is not first[0]
+
+    async def test_extract_cache_respects_user_id(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test cached facts are re-stamped with the caller's user_id."""
+        stub_provider.classify_return = json.dumps(
+            [{"category": "preference", "fact": "likes tea"}]
+        )
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        await extractor.extract("I really like green tea", "Nice choice!", 1)
+        facts = await extractor.extract("I really like green tea", "Nice choice!", 2)
+
+        assert stub_provider.classify_calls == 1
+        assert facts[0].user_id == 2
+
+    async def test_extract_cache_evicts_least_recently_used(
+        self, stub_provider: _StubProvider, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the extraction cache is bounded by FACT_CACHE_SIZE."""
+        monkeypatch.setattr("src.memory.extractor.FACT_CACHE_SIZE", 2)
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        await extractor.extract("first message!", "reply", 1)
+        await extractor.extract("second message!", "reply", 1)
+        await extractor.extract("first message!", "reply", 1)  # refresh
+        await extractor.extract("third message!", "reply", 1)  # evicts second
+        assert stub_provider.classify_calls == 3
+
+        await extractor.extract("first message!", "reply", 1)
+        assert stub_provider.classify_calls == 3
+        await extractor.extract("second message!", "reply", 1)
+        assert stub_provider.classify_calls == 4
+
+    async def test_extract_does_not_cache_provider_errors(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test a failed provider call is retried on the next identical exchange."""
+        stub_provider.classify_side_effect = [Exception("Provider error"), "[]"]
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        await extractor.extract("I really like green tea", "Nice choice!", 1)
+        await extractor.extract("I really like green tea", "Nice choice!", 1)
+
+        assert stub_provider.classify_calls == 2
+
+    async def test_extract_handles_exception_from_provider(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test extract() handles exceptions from provider gracefully."""
-        provider = MagicMock()
-        provider.classify = AsyncMock(side_effect=Exception("Provider error"))
+        stub_provider.classify_side_effect = Exception("Provider error")
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         facts = await extractor.extract(
             user_message="I like Python",
             bot_response="Great!",
@@ -246,10 +465,11 @@ class TestFactExtractor:
         )
         assert summary is None
 
-    async def test_summarize_returns_none_for_less_than_two_messages(self) -> None:
+    async def test_summarize_returns_none_for_less_than_two_messages(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() returns None when there are fewer than 2 messages."""
-        provider = MagicMock()
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         # Empty list
         summary = await extractor.summarize([])
@@ -258,15 +478,15 @@ class TestFactExtractor:
         # Single message
         summary = await extractor.summarize([{"role": "user", "content": "Hello"}])
         assert summary is None
+        assert stub_provider.chat_calls == 0
 
-    async def test_summarize_returns_content_from_provider(self) -> None:
+    async def test_summarize_returns_content_from_provider(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() returns content from provider's chat response."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "Summary of conversation"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
+        stub_provider.chat_return = "Summary of conversation"
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
         messages = [
             {"role": "user", "content": "Tell me about Python"},
             {"role": "assistant", "content": "Python is a programming language"},
@@ -279,28 +499,25 @@ class TestFactExtractor:
         assert summary == "Summary of conversation"
 
         # Verify provider.chat was called with correct arguments
-        provider.chat.assert_called_once()
-        call_args = provider.chat.call_args
-        assert "messages" in call_args.kwargs
-        assert "max_tokens" in call_args.kwargs
-        assert "temperature" in call_args.kwargs
-        assert call_args.kwargs["max_tokens"] == 200
-        assert call_args.kwargs["temperature"] == 0.3
+        assert stub_provider.chat_calls == 1
+        kwargs = stub_provider.last_kwargs
+        assert "messages" in kwargs
+        assert "max_tokens" in kwargs
+        assert "temperature" in kwargs
+        assert kwargs["max_tokens"] == 200
+        assert kwargs["temperature"] == 0.3
 
         # Verify system message contains SUMMARIZE_SYSTEM
-        messages_arg = call_args.kwargs["messages"]
+        messages_arg = kwargs["messages"]
         assert len(messages_arg) == 2
         assert messages_arg[0]["role"] == "system"
         assert messages_arg[0]["content"] == SUMMARIZE_SYSTEM
 
-    async def test_summarize_limits_to_last_20_messages(self) -> None:
+    async def test_summarize_limits_to_last_20_messages(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() only includes last 20 messages in transcript."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "Summary"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
-
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         # Create 25 messages
         messages = []
@@ -310,22 +527,17 @@ class TestFactExtractor:
         await extractor.summarize(messages)
 
         # Verify the transcript only includes last 20 messages
-        call_args = provider.chat.call_args
-        messages_arg = call_args.kwargs["messages"]
-        transcript = messages_arg[1]["content"]
+        transcript = stub_provider.last_kwargs["messages"][1]["content"]
 
         # Should contain "Message 24" (last) but not "Message 0" (first)
         assert "Message 24" in transcript
         assert "Message 0" not in transcript
 
-    async def test_summarize_truncates_message_content(self) -> None:
+    async def test_summarize_truncates_message_content(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() truncates message content to 200 characters."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "Summary"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
-
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         long_content = "x" * 500
         messages = [
@@ -335,22 +547,17 @@ class TestFactExtractor:
 
         await extractor.summarize(messages)
 
-        call_args = provider.chat.call_args
-        messages_arg = call_args.kwargs["messages"]
-        transcript = messages_arg[1]["content"]
+        transcript = stub_provider.last_kwargs["messages"][1]["content"]
 
         # The transcript should have truncated content
         # Should not contain all 500 'x' characters
         assert transcript.count("x") <= 200
 
-    async def test_summarize_handles_messages_without_role(self) -> None:
+    async def test_summarize_handles_messages_without_role(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() handles messages missing role field."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "Summary"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
-
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         messages = [
             {"content": "Message without role"},
@@ -362,14 +569,11 @@ class TestFactExtractor:
         # Should still work, defaulting to "user"
         assert summary == "Summary"
 
-    async def test_summarize_handles_messages_without_content(self) -> None:
+    async def test_summarize_handles_messages_without_content(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() handles messages missing content field."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "Summary"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
-
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         messages = [
             {"role": "user"},
@@ -381,12 +585,13 @@ class TestFactExtractor:
         # Should still work, defaulting to empty string
         assert summary == "Summary"
 
-    async def test_summarize_handles_exception_from_provider(self) -> None:
+    async def test_summarize_handles_exception_from_provider(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() handles exceptions from provider gracefully."""
-        provider = MagicMock()
-        provider.chat = AsyncMock(side_effect=Exception("Provider error"))
+        stub_provider.chat_side_effect = Exception("Provider error")
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         messages = [
             {"role": "user", "content": "Hello"},
@@ -397,14 +602,13 @@ class TestFactExtractor:
 
         assert summary is None
 
-    async def test_summarize_strips_whitespace_from_response(self) -> None:
+    async def test_summarize_strips_whitespace_from_response(
+        self, stub_provider: _StubProvider
+    ) -> None:
         """Test summarize() strips leading/trailing whitespace from response."""
-        provider = MagicMock()
-        mock_chat_response = MagicMock()
-        mock_chat_response.content = "   Summary with whitespace   \n\n"
-        provider.chat = AsyncMock(return_value=mock_chat_response)
+        stub_provider.chat_return = "   Summary with whitespace   \n\n"
 
-        extractor = FactExtractor(chat_provider=provider)
+        extractor = FactExtractor(chat_provider=stub_provider)
 
         messages = [
             {"role": "user", "content": "Hello"},
@@ -414,3 +618,30 @@ class TestFactExtractor:
         summary = await extractor.summarize(messages)
 
         assert summary == "Summary with whitespace"
+
+    async def test_process_runs_extract_and_summarize_concurrently(
+        self, stub_provider: _StubProvider
+    ) -> None:
+        """Test process() overlaps the extraction and summary provider calls."""
+        stub_provider.classify_return = json.dumps(
+            [{"category": "work", "fact": "uses Go"}]
+        )
+        stub_provider.delay = 0.1
+
+        extractor = FactExtractor(chat_provider=stub_provider)
+        history = [
+            {"role": "user", "content": "We use Go at work"},
+            {"role": "assistant", "content": "Go is great for services"},
+        ]
+
+        start = time.monotonic()
+        facts, summary = await extractor.process(
+            "We use Go at work", "Go is great for services", 7, history
+        )
+        elapsed = time.monotonic() - start
+
+        assert [f.fact for f in facts] == ["uses Go"]
+        assert summary == "Summary"
+        assert stub_provider.classify_calls == 1
+        assert stub_provider.chat_calls == 1
+        assert elapsed < 0.15
@@ -1,11 +1,12 @@
 """Test MemoryManager — recall and store user facts and summaries."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from src.memory.extractor import FactExtractor
-from src.memory.manager import MemoryManager
+from src.memory.manager import MAX_USER_FACTS, MemoryManager
 from src.memory.models import MemoryContext, UserFact
 
 
@@ -71,6 +72,117 @@ class TestMemoryManager:
         manager._get_user_facts.assert_called_once_with(123)
         manager._search_summaries.assert_called_once_with(123, "tell me about Python", limit=3)
 
+    async def test_recall_skips_db_for_known_empty_user(self) -> None:
+        """Test recall() answers from memory once a user is known to be empty."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall = AsyncMock(return_value=[])
+        mock_conn.execute = AsyncMock(return_value=mock_cursor)
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager)
+
+        await manager.recall(user_id=5, message="hello there")
+        assert mock_conn.execute.call_count == 2
+
+        context = await manager.recall(user_id=5, message="hello again")
+        assert mock_conn.execute.call_count == 2
+        assert context.facts == []
+        assert context.summaries == []
+
+        # A write makes the user eligible for a real lookup again; facts are
+        # still cached, so only the insert and the summaries query run
+        await manager._store_summary(user_id=5, summary="Said hello")
+        await manager.recall(user_id=5, message="hello once more")
+        assert mock_conn.execute.call_count == 4
+
+    async def test_recall_rechecks_user_after_buffered_summary_flush(self) -> None:
+        """Test flush() clears an empty mark set while the summary was buffered."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall = AsyncMock(return_value=[])
+        mock_conn.execute = AsyncMock(return_value=mock_cursor)
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager, batch_summaries=True)
+
+        await manager._store_summary(user_id=5, summary="Said hello")
+        await manager.recall(user_id=5, message="hello there")
+        assert 5 in manager._empty_users
+
+        await manager.flush()
+
+        assert 5 not in manager._empty_users
+
+    async def test_recall_does_not_mark_empty_after_lookup_error(self) -> None:
+        """Test a failed summaries lookup does not make the user look empty."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall = AsyncMock(return_value=[])
+
+        async def execute(sql: str, params: tuple) -> MagicMock:
+            if "conversation_summaries" in sql:
+                raise Exception("Database error")
+            return mock_cursor
+
+        mock_conn.execute = AsyncMock(side_effect=execute)
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        # A falsy __aexit__ lets the error propagate out of the async with
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock(
+            return_value=False
+        )
+
+        manager = MemoryManager(db_manager=db_manager)
+
+        context = await manager.recall(user_id=5, message="hello there")
+
+        assert context.summaries == []
+        assert 5 not in manager._empty_users
+
+    async def test_known_empty_users_are_bounded(self, monkeypatch) -> None:
+        """Test the known-empty set evicts the least recently seen user."""
+        monkeypatch.setattr("src.memory.manager.FACTS_CACHE_SIZE", 2)
+        manager = MemoryManager(db_manager=MagicMock())
+        manager._get_user_facts = AsyncMock(return_value=[])
+        manager._search_summaries = AsyncMock(return_value=[])
+
+        for user_id in (1, 2, 3):
+            await manager.recall(user_id=user_id)
+
+        assert list(manager._empty_users) == [2, 3]
+
+    async def test_recall_runs_queries_concurrently(self) -> None:
+        """Test recall() overlaps the facts and summaries queries."""
+        manager = MemoryManager(db_manager=MagicMock())
+        summaries_started = asyncio.Event()
+
+        async def get_facts(user_id: int) -> list[UserFact]:
+            # Only completes if the summaries query starts while this one waits
+            await summaries_started.wait()
+            return []
+
+        async def search_summaries(user_id: int, query: str, limit: int) -> list[str]:
+            summaries_started.set()
+            return ["Summary"]
+
+        manager._get_user_facts = get_facts
+        manager._search_summaries = search_summaries
+
+        context = await asyncio.wait_for(manager.recall(user_id=1, message="hi"), 1)
+
+        assert context.summaries == ["Summary"]
+
     async def test_extract_and_store_does_nothing_without_extractor(self) -> None:
         """Test extract_and_store() does nothing when no extractor."""
         manager = MemoryManager(extractor=None)
@@ -91,7 +203,7 @@ class TestMemoryManager:
         extractor.extract = AsyncMock(return_value=[fact1, fact2])
 
         manager = MemoryManager(extractor=extractor)
-        manager._upsert_fact = AsyncMock()
+        manager._upsert_facts_bulk = AsyncMock()
 
         await manager.extract_and_store(
             user_id=456,
@@ -106,10 +218,8 @@ class TestMemoryManager:
             456,
         )
 
-        # Verify _upsert_fact was called for each fact
-        assert manager._upsert_fact.call_count == 2
-        manager._upsert_fact.assert_any_call(456, fact1)
-        manager._upsert_fact.assert_any_call(456, fact2)
+        # Verify all facts were stored in a single bulk upsert
+        manager._upsert_facts_bulk.assert_called_once_with(456, [fact1, fact2])
 
     async def test_extract_and_store_handles_empty_facts_list(self) -> None:
         """Test extract_and_store() handles empty facts list from extractor."""
@@ -117,7 +227,7 @@ class TestMemoryManager:
         extractor.extract = AsyncMock(return_value=[])
 
         manager = MemoryManager(extractor=extractor)
-        manager._upsert_fact = AsyncMock()
+        manager._upsert_facts_bulk = AsyncMock()
 
         await manager.extract_and_store(
             user_id=789,
@@ -127,7 +237,7 @@ class TestMemoryManager:
 
         # Verify extractor was called but no upserts happened
         extractor.extract.assert_called_once()
-        manager._upsert_fact.assert_not_called()
+        manager._upsert_facts_bulk.assert_not_called()
 
     async def test_summarize_session_does_nothing_without_extractor(self) -> None:
         """Test summarize_session() does nothing when no extractor."""
@@ -276,6 +386,22 @@ class TestMemoryManager:
         # Verify order is preserved
         assert pos1 < pos2 < pos3
 
+    def test_format_for_prompt_reflects_mutated_context(self) -> None:
+        """Test format_for_prompt() output follows changes to a reused context."""
+        manager = MemoryManager()
+        memory = MemoryContext(
+            facts=[UserFact(user_id=1, category="work", fact="data engineer")]
+        )
+
+        first = manager.format_for_prompt(memory)
+        assert manager.format_for_prompt(memory) is first
+
+        memory.facts.append(UserFact(user_id=1, category="location", fact="Oslo"))
+        second = manager.format_for_prompt(memory)
+
+        assert "- [location] Oslo" in second
+        assert "- [location] Oslo" not in first
+
     async def test_get_user_facts_returns_empty_without_db(self) -> None:
         """Test _get_user_facts() returns empty list without db_manager."""
         manager = MemoryManager()
@@ -289,24 +415,10 @@ class TestMemoryManager:
         mock_cursor = MagicMock()
 
         # Setup mock database response
-        mock_row1 = {
-            "user_id": 123,
-            "category": "preference",
-            "fact": "likes Python",
-            "source": "auto_extract",
-            "confidence": 1.0,
-            "created_at": None,
-            "updated_at": None,
-        }
-        mock_row2 = {
-            "user_id": 123,
-            "category": "work",
-            "fact": "software engineer",
-            "source": "manual",
-            "confidence": 0.9,
-            "created_at": None,
-            "updated_at": None,
-        }
+        # Rows arrive in UserFact field order:
+        # user_id, category, fact, source, confidence, created_at, updated_at
+        mock_row1 = (123, "preference", "likes Python", "auto_extract", 1.0, None, None)
+        mock_row2 = (123, "work", "software engineer", "manual", 0.9, None, None)
 
         mock_cursor.fetchall = AsyncMock(return_value=[mock_row1, mock_row2])
         mock_conn.execute = AsyncMock(return_value=mock_cursor)
@@ -323,6 +435,71 @@ class TestMemoryManager:
         assert facts[1].fact == "software engineer"
         assert facts[1].source == "manual"
 
+        # Verify the query is bounded in SQL rather than trimmed in Python
+        sql, params = mock_conn.execute.call_args[0]
+        assert "LIMIT ?" in sql
+        assert params == (123, MAX_USER_FACTS)
+
+    async def test_get_user_facts_cached_until_upsert(self) -> None:
+        """Test _get_user_facts() serves repeats from cache until facts change."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        row = (7, "work", "SRE", None, 1.0, None, None)
+        mock_cursor.fetchall = AsyncMock(return_value=[row])
+        mock_conn.execute = AsyncMock(return_value=mock_cursor)
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager)
+
+        first = await manager._get_user_facts(user_id=7)
+        second = await manager._get_user_facts(user_id=7)
+        assert mock_conn.execute.call_count == 1
+        assert [f.fact for f in second] == [f.fact for f in first] == ["SRE"]
+
+        await manager._upsert_fact(7, UserFact(user_id=7, category="work", fact="SWE"))
+        await manager._get_user_facts(user_id=7)
+        assert mock_conn.execute.call_count == 2
+
+        manager.clear_cache()
+        await manager._get_user_facts(user_id=7)
+        assert mock_conn.execute.call_count == 3
+
+    async def test_get_user_facts_not_cached_when_write_overlaps(self) -> None:
+        """Test a fetch that races a fact write does not cache the stale rows."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall = AsyncMock(return_value=[])
+        fetch_started = asyncio.Event()
+        release_fetch = asyncio.Event()
+
+        async def execute(sql: str, params: tuple) -> MagicMock:
+            fetch_started.set()
+            await release_fetch.wait()
+            return mock_cursor
+
+        mock_conn.execute = AsyncMock(side_effect=execute)
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager)
+
+        fetch = asyncio.create_task(manager._get_user_facts(user_id=9))
+        await fetch_started.wait()
+        await manager._upsert_fact(9, UserFact(user_id=9, category="work", fact="SRE"))
+        release_fetch.set()
+
+        assert await fetch == []
+        assert 9 not in manager._facts_cache
+
     async def test_get_user_facts_handles_database_exception(self) -> None:
         """Test _get_user_facts() handles database exceptions gracefully."""
         db_manager = MagicMock()
@@ -377,13 +554,9 @@ class TestMemoryManager:
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
 
-        # First execute returns empty (no keyword matches)
-        # Second execute returns recent summaries
+        # No keyword matches: the combined query yields only recent summaries
         mock_cursor.fetchall = AsyncMock(
-            side_effect=[
-                [],  # No keyword matches
-                [("Recent summary 1",), ("Recent summary 2",)],  # Recent summaries
-            ]
+            return_value=[("Recent summary 1",), ("Recent summary 2",)]
         )
         mock_conn.execute = AsyncMock(return_value=mock_cursor)
         db_manager.get_connection = MagicMock()
@@ -399,6 +572,12 @@ class TestMemoryManager:
         assert summaries[0] == "Recent summary 1"
         assert summaries[1] == "Recent summary 2"
 
+        # Keyword search and recency fallback share a single round-trip
+        mock_conn.execute.assert_called_once()
+        sql, params = mock_conn.execute.call_args[0]
+        assert "UNION ALL" in sql
+        assert params == ('"tell" OR "about" OR "databases"', 100, 100, 2, 2)
+
     async def test_search_summaries_uses_recent_for_short_query(self) -> None:
         """Test _search_summaries() uses recent summaries when query is too short."""
         db_manager = MagicMock()
@@ -420,6 +599,23 @@ class TestMemoryManager:
         assert len(summaries) == 1
         assert summaries[0] == "Recent summary"
 
+    def test_build_match_query_quotes_significant_words(self) -> None:
+        """Test _build_match_query() ORs quoted words longer than 3 chars."""
+        match = MemoryManager._build_match_query('tell me about "Python" NEAR async')
+
+        assert match == '"tell" OR "about" OR "Python" OR "NEAR" OR "async"'
+
+    def test_build_match_query_strips_punctuation(self) -> None:
+        """Test _build_match_query() keeps only word characters of each token."""
+        match = MemoryManager._build_match_query("asyncio? (и Python-скрипты)")
+
+        assert match == '"asyncio" OR "Python" OR "скрипты"'
+
+    def test_build_match_query_empty_for_short_query(self) -> None:
+        """Test _build_match_query() returns empty string for short queries."""
+        assert MemoryManager._build_match_query("test") == ""
+        assert MemoryManager._build_match_query("a b c d e f") == ""
+
     async def test_search_summaries_handles_database_exception(self) -> None:
         """Test _search_summaries() handles database exceptions gracefully."""
         db_manager = MagicMock()
@@ -447,7 +643,7 @@ class TestMemoryManager:
         """Test _upsert_fact() inserts fact into database."""
         db_manager = MagicMock()
         mock_conn = MagicMock()
-        mock_conn.execute = AsyncMock()
+        mock_conn.executemany = AsyncMock()
         mock_conn.commit = AsyncMock()
         db_manager.get_connection = MagicMock()
         db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
@@ -464,19 +660,45 @@ class TestMemoryManager:
 
         await manager._upsert_fact(user_id=456, fact=fact)
 
-        # Verify database execute was called
-        mock_conn.execute.assert_called_once()
-        call_args = mock_conn.execute.call_args
+        # Verify the single fact went through the bulk statement
+        mock_conn.executemany.assert_called_once()
+        call_args = mock_conn.executemany.call_args
         sql = call_args[0][0]
         params = call_args[0][1]
 
         assert "INSERT INTO user_memory" in sql
         assert "ON CONFLICT" in sql
-        assert params == (456, "preference", "likes Python", "auto_extract", 0.95)
+        assert params == [(456, "preference", "likes Python", "auto_extract", 0.95)]
 
         # Verify commit was called
         mock_conn.commit.assert_called_once()
 
+    async def test_upsert_facts_bulk_uses_one_statement_and_commit(self) -> None:
+        """Test _upsert_facts_bulk() writes all facts with one executemany and commit."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager)
+        facts = [
+            UserFact(user_id=1, category="preference", fact="likes Go"),
+            UserFact(user_id=1, category="work", fact="SRE", source="manual"),
+        ]
+
+        await manager._upsert_facts_bulk(user_id=1, facts=facts)
+
+        db_manager.get_connection.assert_called_once()
+        mock_conn.executemany.assert_called_once()
+        assert mock_conn.executemany.call_args[0][1] == [
+            (1, "preference", "likes Go", None, 1.0),
+            (1, "work", "SRE", "manual", 1.0),
+        ]
+        mock_conn.commit.assert_called_once()
+
     async def test_upsert_fact_handles_database_exception(self) -> None:
         """Test _upsert_fact() handles database exceptions gracefully."""
         db_manager = MagicMock()
@@ -550,6 +772,53 @@ class TestMemoryManager:
         params = call_args[0][1]
         assert params == (200, None, "Summary without session")
 
+    async def test_store_summary_batches_until_flush(self) -> None:
+        """Test _store_summary() buffers rows and flush() writes them at once."""
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_conn.execute = AsyncMock()
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager, batch_summaries=True)
+
+        await manager._store_summary(user_id=1, summary="First", session_id="s1")
+        await manager._store_summary(user_id=2, summary="Second")
+
+        mock_conn.execute.assert_not_called()
+        mock_conn.executemany.assert_not_called()
+
+        await manager.flush()
+
+        mock_conn.executemany.assert_called_once()
+        assert mock_conn.executemany.call_args[0][1] == [
+            (1, "s1", "First"),
+            (2, None, "Second"),
+        ]
+        mock_conn.commit.assert_called_once()
+        assert manager._flush_task is None
+
+    async def test_store_summary_flushes_after_delay(self, monkeypatch) -> None:
+        """Test buffered summaries are written once the batching window closes."""
+        monkeypatch.setattr("src.memory.manager.SUMMARY_FLUSH_DELAY", 0)
+        db_manager = MagicMock()
+        mock_conn = MagicMock()
+        mock_conn.executemany = AsyncMock()
+        mock_conn.commit = AsyncMock()
+        db_manager.get_connection = MagicMock()
+        db_manager.get_connection.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        db_manager.get_connection.return_value.__aexit__ = AsyncMock()
+
+        manager = MemoryManager(db_manager=db_manager, batch_summaries=True)
+        await manager._store_summary(user_id=1, summary="Only")
+        await manager._flush_task
+
+        assert mock_conn.executemany.call_args[0][1] == [(1, None, "Only")]
+        mock_conn.commit.assert_called_once()
+
     async def test_store_summary_handles_database_exception(self) -> None:
         """Test _store_summary() handles database exceptions gracefully."""
         db_manager = MagicMock()
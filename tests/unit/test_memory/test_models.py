@@ -1,10 +1,16 @@
 """Test memory data models — UserFact, ConversationSummary, MemoryContext."""
 
+from dataclasses import FrozenInstanceError
 from datetime import datetime, timezone
 
 import pytest
 
-from src.memory.models import ConversationSummary, MemoryContext, UserFact
+from src.memory.models import (
+    ConversationSummary,
+    MemoryContext,
+    Message,
+    UserFact,
+)
 
 
 class TestUserFact:
@@ -50,6 +56,14 @@ class TestUserFact:
         fact = UserFact(user_id=1, category="work", fact="software engineer")
         assert fact.confidence == 1.0
 
+    def test_is_slotted_and_immutable(self) -> None:
+        """Test UserFact has no per-instance dict and rejects reassignment."""
+        fact = UserFact(user_id=1, category="work", fact="SRE")
+
+        assert not hasattr(fact, "__dict__")
+        with pytest.raises(FrozenInstanceError):
+            fact.fact = "SWE"  # type: ignore[misc]
+
     def test_from_row_with_full_data(self) -> None:
         """Test from_row() creates UserFact from complete database row."""
         created = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
@@ -75,6 +89,33 @@ class TestUserFact:
         assert fact.created_at == created
         assert fact.updated_at == updated
 
+    def test_from_tuple_with_full_data(self) -> None:
+        """Test from_tuple() creates UserFact from a positional database row."""
+        created = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        updated = datetime(2024, 1, 2, 12, 0, 0, tzinfo=timezone.utc)
+
+        row = (789, "technical", "uses VS Code", "auto_extract", 0.85, created, updated)
+
+        fact = UserFact.from_tuple(row)
+
+        assert fact.user_id == 789
+        assert fact.category == "technical"
+        assert fact.fact == "uses VS Code"
+        assert fact.source == "auto_extract"
+        assert fact.confidence == 0.85
+        assert fact.created_at == created
+        assert fact.updated_at == updated
+
+    def test_from_tuple_with_minimal_data(self) -> None:
+        """Test from_tuple() applies defaults for omitted trailing columns."""
+        fact = UserFact.from_tuple((100, "location", "timezone EST"))
+
+        assert fact.user_id == 100
+        assert fact.source is None
+        assert fact.confidence == 1.0
+        assert fact.created_at is None
+        assert fact.updated_at is None
+
     def test_from_row_with_minimal_data(self) -> None:
         """Test from_row() handles row with only required fields."""
         row = {
@@ -152,6 +193,23 @@ class TestConversationSummary:
         assert summary.session_id is None
         assert summary.created_at is None
 
+    def test_has_no_instance_dict(self) -> None:
+        """Test ConversationSummary is slotted."""
+        summary = ConversationSummary(user_id=1, summary="Talked about Go")
+
+        assert not hasattr(summary, "__dict__")
+
+
+class TestMessage:
+    """Test Message dataclass."""
+
+    def test_as_dict(self) -> None:
+        """Test as_dict() produces the role/content mapping for prompts."""
+        message = Message(role="user", content="Hello")
+
+        assert message.as_dict() == {"role": "user", "content": "Hello"}
+        assert not hasattr(message, "__dict__")
+
 
 class TestMemoryContext:
     """Test MemoryContext dataclass."""
@@ -190,16 +248,14 @@ class TestMemoryContext:
 
     def test_construction_with_working_memory(self) -> None:
         """Test MemoryContext can be created with working memory."""
-        working_memory = [
-            {"role": "user", "content": "Hello"},
-            {"role": "assistant", "content": "Hi there!"},
-        ]
+        working_memory = [Message("user", "Hello"), Message("assistant", "Hi there!")]
 
         context = MemoryContext(working_memory=working_memory)
 
         assert len(context.working_memory) == 2
-        assert context.working_memory[0]["role"] == "user"
-        assert context.working_memory[1]["role"] == "assistant"
+        assert context.working_memory[0].role == "user"
+        assert context.working_memory[1].role == "assistant"
+        assert context.working_memory[1].content == "Hi there!"
         assert context.facts == []
         assert context.summaries == []
 
@@ -207,7 +263,7 @@ class TestMemoryContext:
         """Test MemoryContext can be created with all fields populated."""
         fact = UserFact(user_id=1, category="personal", fact="name is Alice")
         summaries = ["Previous discussion about databases"]
-        working_memory = [{"role": "user", "content": "Tell me about SQLite"}]
+        working_memory = [Message("user", "Tell me about SQLite")]
 
         context = MemoryContext(
             facts=[fact],
@@ -230,3 +286,21 @@ class TestMemoryContext:
         assert len(context1.facts) == 1
         assert len(context2.facts) == 0
         assert context1.facts is not context2.facts
+
+    def test_from_rows_matches_separate_construction(self) -> None:
+        """Test from_rows() builds the same context as constructing each part."""
+        fact_rows = [
+            (1, "work", "data engineer", "manual", 0.9, None, None),
+            (1, "location", "lives in Oslo"),
+        ]
+        summary_rows = [("Discussed Kafka",), ("Planned a migration",)]
+        working_memory = [Message("user", "Hi")]
+
+        context = MemoryContext.from_rows(fact_rows, summary_rows, working_memory)
+
+        assert context == MemoryContext(
+            facts=[UserFact.from_tuple(row) for row in fact_rows],
+            summaries=["Discussed Kafka", "Planned a migration"],
+            working_memory=[Message("user", "Hi")],
+        )
+        assert context.working_memory is not working_memory
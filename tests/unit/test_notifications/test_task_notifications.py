@@ -1,6 +1,6 @@
 """Tests for TaskNotificationHandler."""
 
-from unittest.mock import AsyncMock
+from typing import Any
 
 import pytest
 
@@ -14,30 +14,51 @@ from src.events.types import (
 from src.notifications.task_notifications import TaskNotificationHandler
 
 
-@pytest.fixture
+@pytest.fixture(scope="class")
 def event_bus() -> EventBus:
     return EventBus()
 
 
-@pytest.fixture
-def mock_bot() -> AsyncMock:
-    bot = AsyncMock()
-    bot.send_message = AsyncMock()
-    return bot
+class _StubBot:
+    """Records send_message calls; raises raise_error instead when set."""
 
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+        self.raise_error: Exception | None = None
 
-@pytest.fixture
-def handler(event_bus: EventBus, mock_bot: AsyncMock) -> TaskNotificationHandler:
-    h = TaskNotificationHandler(event_bus=event_bus, bot=mock_bot)
+    async def send_message(self, **kwargs: Any) -> None:
+        self.calls.append(kwargs)
+        if self.raise_error is not None:
+            raise self.raise_error
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.raise_error = None
+
+
+@pytest.fixture(scope="class")
+def stub_bot() -> _StubBot:
+    return _StubBot()
+
+
+@pytest.fixture(scope="class")
+def handler(event_bus: EventBus, stub_bot: _StubBot) -> TaskNotificationHandler:
+    h = TaskNotificationHandler(event_bus=event_bus, bot=stub_bot)
     h.register()
     return h
 
 
+@pytest.fixture(autouse=True)
+def _reset(stub_bot: _StubBot) -> None:
+    # The bot is shared per class; clear calls and any injected error between tests
+    stub_bot.reset()
+
+
 class TestHandleProgress:
     """Tests for progress notification handling."""
 
     async def test_sends_progress_message(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends formatted progress notification."""
         event = TaskProgressEvent(
@@ -51,8 +72,8 @@ class TestHandleProgress:
 
         await handler.handle_progress(event)
 
-        mock_bot.send_message.assert_called_once()
-        kwargs = mock_bot.send_message.call_args[1]
+        assert len(stub_bot.calls) == 1
+        kwargs = stub_bot.calls[-1]
         assert kwargs["chat_id"] == 100
         assert kwargs["message_thread_id"] == 5
         assert kwargs["parse_mode"] == "HTML"
@@ -61,20 +82,12 @@ class TestHandleProgress:
         assert "$0.42" in kwargs["text"]
         assert "Running tests" in kwargs["text"]
 
-    async def test_ignores_non_progress_events(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
-    ) -> None:
-        """Ignores events that are not TaskProgressEvent."""
-        event = Event(source="test")
-        await handler.handle_progress(event)
-        mock_bot.send_message.assert_not_called()
-
 
 class TestHandleCompleted:
     """Tests for completion notification handling."""
 
     async def test_sends_completion_message(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends formatted completion notification."""
         event = TaskCompletedEvent(
@@ -91,8 +104,8 @@ class TestHandleCompleted:
 
         await handler.handle_completed(event)
 
-        mock_bot.send_message.assert_called_once()
-        kwargs = mock_bot.send_message.call_args[1]
+        assert len(stub_bot.calls) == 1
+        kwargs = stub_bot.calls[-1]
         assert kwargs["chat_id"] == 200
         text = kwargs["text"]
         assert "done1234" in text
@@ -103,7 +116,7 @@ class TestHandleCompleted:
         assert "Fixed 3 bugs" in text
 
     async def test_completion_without_commits(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends completion notification without commits section."""
         event = TaskCompletedEvent(
@@ -117,23 +130,15 @@ class TestHandleCompleted:
 
         await handler.handle_completed(event)
 
-        text = mock_bot.send_message.call_args[1]["text"]
+        text = stub_bot.calls[-1]["text"]
         assert "Коммитов" not in text
 
-    async def test_ignores_non_completed_events(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
-    ) -> None:
-        """Ignores events that are not TaskCompletedEvent."""
-        event = Event(source="test")
-        await handler.handle_completed(event)
-        mock_bot.send_message.assert_not_called()
-
 
 class TestHandleFailed:
     """Tests for failure notification handling."""
 
     async def test_sends_failure_with_keyboard(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends failure notification with action buttons."""
         event = TaskFailedEvent(
@@ -147,8 +152,8 @@ class TestHandleFailed:
 
         await handler.handle_failed(event)
 
-        mock_bot.send_message.assert_called_once()
-        kwargs = mock_bot.send_message.call_args[1]
+        assert len(stub_bot.calls) == 1
+        kwargs = stub_bot.calls[-1]
         assert kwargs["chat_id"] == 300
         text = kwargs["text"]
         assert "fail1234" in text
@@ -163,20 +168,12 @@ class TestHandleFailed:
         assert "tasklog:fail1234" in callback_data_values
         assert "taskretry:fail1234" in callback_data_values
 
-    async def test_ignores_non_failed_events(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
-    ) -> None:
-        """Ignores events that are not TaskFailedEvent."""
-        event = Event(source="test")
-        await handler.handle_failed(event)
-        mock_bot.send_message.assert_not_called()
-
 
 class TestHandleTimeout:
     """Tests for timeout notification handling."""
 
     async def test_sends_timeout_with_keyboard(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends timeout notification with restart/stop buttons."""
         event = TaskTimeoutEvent(
@@ -190,8 +187,8 @@ class TestHandleTimeout:
 
         await handler.handle_timeout(event)
 
-        mock_bot.send_message.assert_called_once()
-        kwargs = mock_bot.send_message.call_args[1]
+        assert len(stub_bot.calls) == 1
+        kwargs = stub_bot.calls[-1]
         assert kwargs["chat_id"] == 400
         assert kwargs["message_thread_id"] == 10
         text = kwargs["text"]
@@ -205,52 +202,62 @@ class TestHandleTimeout:
         assert "taskretry:hang1234" in callback_data_values
         assert "taskstop:hang1234" in callback_data_values
 
-    async def test_ignores_non_timeout_events(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+
+class TestIgnoresForeignEvents:
+    """Tests that each handler skips events of other types."""
+
+    @pytest.mark.parametrize(
+        "method_name",
+        ["handle_progress", "handle_completed", "handle_failed", "handle_timeout"],
+    )
+    async def test_ignores(
+        self,
+        handler: TaskNotificationHandler,
+        stub_bot: _StubBot,
+        method_name: str,
     ) -> None:
-        """Ignores events that are not TaskTimeoutEvent."""
-        event = Event(source="test")
-        await handler.handle_timeout(event)
-        mock_bot.send_message.assert_not_called()
+        """Ignores events that are not the handler's task event type."""
+        await getattr(handler, method_name)(Event(source="test"))
+        assert stub_bot.calls == []
 
 
 class TestSend:
     """Tests for the internal _send method."""
 
     async def test_skips_when_no_chat_id(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Skips sending when chat_id is 0 or falsy."""
         await handler._send(0, "test message")
-        mock_bot.send_message.assert_not_called()
+        assert stub_bot.calls == []
 
     async def test_handles_telegram_error(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Logs error but does not raise on TelegramError."""
         from telegram.error import TelegramError
 
-        mock_bot.send_message.side_effect = TelegramError("Chat not found")
+        stub_bot.raise_error = TelegramError("Chat not found")
 
         # Should not raise
         await handler._send(999, "test message")
 
     async def test_passes_thread_id(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Passes message_thread_id when provided."""
         await handler._send(100, "test", message_thread_id=42)
 
-        kwargs = mock_bot.send_message.call_args[1]
+        kwargs = stub_bot.calls[-1]
         assert kwargs["message_thread_id"] == 42
 
     async def test_sends_without_thread_id(
-        self, handler: TaskNotificationHandler, mock_bot: AsyncMock
+        self, handler: TaskNotificationHandler, stub_bot: _StubBot
     ) -> None:
         """Sends without thread_id when not provided."""
         await handler._send(100, "test")
 
-        kwargs = mock_bot.send_message.call_args[1]
+        kwargs = stub_bot.calls[-1]
         assert kwargs["message_thread_id"] is None
 
 
@@ -258,14 +265,16 @@ class TestRegister:
     """Tests for event bus subscription."""
 
     def test_register_subscribes_to_all_task_events(
-        self, event_bus: EventBus, mock_bot: AsyncMock
+        self, event_bus: EventBus, stub_bot: _StubBot
     ) -> None:
         """Registers handlers for all 4 task event types."""
-        h = TaskNotificationHandler(event_bus=event_bus, bot=mock_bot)
+        h = TaskNotificationHandler(event_bus=event_bus, bot=stub_bot)
         h.register()
 
-        # Verify subscriptions exist
-        assert TaskProgressEvent in event_bus._handlers
-        assert TaskCompletedEvent in event_bus._handlers
-        assert TaskFailedEvent in event_bus._handlers
-        assert TaskTimeoutEvent in event_bus._handlers
+        for event_type in (
+            TaskProgressEvent,
+            TaskCompletedEvent,
+            TaskFailedEvent,
+            TaskTimeoutEvent,
+        ):
+            assert event_bus.handler_count(event_type) >= 1, event_type.__name__
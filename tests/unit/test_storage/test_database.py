@@ -1,22 +1,17 @@
 """Tests for database management."""
 
-import tempfile
-from pathlib import Path
-
 import pytest
 
 from src.storage.database import DatabaseManager
 
 
 @pytest.fixture
-async def db_manager():
+async def db_manager(tmp_path):
     """Create test database manager."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        db_path = Path(temp_dir) / "test.db"
-        manager = DatabaseManager(f"sqlite:///{db_path}")
-        await manager.initialize()
-        yield manager
-        await manager.close()
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    await manager.initialize()
+    yield manager
+    await manager.close()
 
 
 class TestDatabaseManager:
@@ -36,6 +31,38 @@ class TestDatabaseManager:
                 await conn1.execute("SELECT 1")
                 await conn2.execute("SELECT 1")
 
+    async def test_connection_pool_reuses_and_overflows(self, db_manager):
+        """Test that pooled connections are reused and overflow ones are closed."""
+        async with db_manager.get_connection() as conn:
+            first = conn
+        async with db_manager.get_connection() as conn:
+            assert conn is first
+
+        held = []
+        for _ in range(db_manager._pool_size + 1):
+            cm = db_manager.get_connection()
+            held.append((cm, await cm.__aenter__()))
+        for cm, _ in held:
+            await cm.__aexit__(None, None, None)
+
+        assert db_manager._connection_pool.qsize() == db_manager._pool_size
+
+    async def test_connection_rolled_back_on_error(self, db_manager):
+        """Test that a connection is returned to the pool without a transaction."""
+        with pytest.raises(RuntimeError):
+            async with db_manager.get_connection() as conn:
+                await conn.execute("BEGIN IMMEDIATE")
+                await conn.execute(
+                    "INSERT INTO users (user_id, telegram_username) VALUES (?, ?)",
+                    (1, "rollback"),
+                )
+                raise RuntimeError("boom")
+
+        assert not conn.in_transaction
+        async with db_manager.get_connection() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM users")
+            assert (await cursor.fetchone())[0] == 0
+
     async def test_schema_creation(self, db_manager):
         """Test that schema is created properly."""
         async with db_manager.get_connection() as conn:
@@ -67,6 +94,18 @@ class TestDatabaseManager:
             result = await cursor.fetchone()
             assert result[0] == 1  # Foreign keys enabled
 
+    async def test_connection_pragmas(self, db_manager):
+        """Test that pooled connections use WAL with relaxed syncing."""
+        async with db_manager.get_connection() as conn:
+            cursor = await conn.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+            cursor = await conn.execute("PRAGMA synchronous")
+            assert (await cursor.fetchone())[0] == 1  # NORMAL
+            cursor = await conn.execute("PRAGMA temp_store")
+            assert (await cursor.fetchone())[0] == 2  # MEMORY
+            cursor = await conn.execute("PRAGMA busy_timeout")
+            assert (await cursor.fetchone())[0] == 5000
+
     async def test_indexes_created(self, db_manager):
         """Test that indexes are created."""
         async with db_manager.get_connection() as conn:
@@ -97,3 +136,48 @@ class TestDatabaseManager:
             cursor = await conn.execute("SELECT MAX(version) FROM schema_version")
             version = await cursor.fetchone()
             assert version[0] >= 1  # At least initial migration
+
+    async def test_summaries_fts_index_tracks_table(self, db_manager):
+        """Test that the summaries FTS index follows inserts, updates and deletes."""
+        async with db_manager.get_connection() as conn:
+            await conn.execute(
+                "INSERT INTO conversation_summaries (user_id, summary, key_topics) "
+                "VALUES (1, 'Discussed Python decorators', 'python')"
+            )
+            await conn.commit()
+
+            query = (
+                "SELECT rowid FROM conversation_summaries_fts "
+                "WHERE conversation_summaries_fts MATCH ?"
+            )
+            cursor = await conn.execute(query, ("decorators",))
+            assert len(await cursor.fetchall()) == 1
+
+            await conn.execute(
+                "UPDATE conversation_summaries SET summary = 'Discussed Rust traits'"
+            )
+            cursor = await conn.execute(query, ("decorators",))
+            assert await cursor.fetchall() == []
+            cursor = await conn.execute(query, ("traits",))
+            assert len(await cursor.fetchall()) == 1
+
+            await conn.execute("DELETE FROM conversation_summaries")
+            cursor = await conn.execute(query, ("traits",))
+            assert await cursor.fetchall() == []
+
+    async def test_in_memory_database_shared_across_pool(self):
+        """Test that an in-memory database is one database for all connections."""
+        manager = DatabaseManager("sqlite:///:memory:")
+        await manager.initialize()
+        try:
+            async with manager.get_connection() as writer:
+                async with manager.get_connection() as reader:
+                    await writer.execute(
+                        "INSERT INTO users (user_id, telegram_username) VALUES (?, ?)",
+                        (1, "memuser"),
+                    )
+                    await writer.commit()
+                    cursor = await reader.execute("SELECT COUNT(*) FROM users")
+                    assert (await cursor.fetchone())[0] == 1
+        finally:
+            await manager.close()
@@ -1,10 +1,10 @@
 """Tests for repository implementations."""
 
-import tempfile
+import shutil
 from datetime import UTC, datetime, timedelta
-from pathlib import Path
 
 import pytest
+import pytest_asyncio
 
 from src.storage.database import DatabaseManager
 from src.storage.models import (
@@ -25,15 +25,27 @@ from src.storage.repositories import (
 )
 
 
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def template_db(tmp_path_factory):
+    """Migrate a database file once per session for tests to copy."""
+    path = tmp_path_factory.mktemp("template") / "template.db"
+    manager = DatabaseManager(f"sqlite:///{path}")
+    await manager.initialize()
+    # Closing the last connection checkpoints the WAL into the main file
+    await manager.close()
+    return path
+
+
 @pytest.fixture
-async def db_manager():
-    """Create test database manager."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        db_path = Path(temp_dir) / "test.db"
-        manager = DatabaseManager(f"sqlite:///{db_path}")
-        await manager.initialize()
-        yield manager
-        await manager.close()
+async def db_manager(template_db, tmp_path):
+    """Create test database manager on a copy of the migrated template."""
+    db_path = tmp_path / "test.db"
+    shutil.copyfile(template_db, db_path)
+    manager = DatabaseManager(f"sqlite:///{db_path}")
+    # Schema version already matches, so no migrations are replayed
+    await manager.initialize()
+    yield manager
+    await manager.close()
 
 
 @pytest.fixture
@@ -1,37 +1,74 @@
 """Tests for HeartbeatService."""
 
 import asyncio
+import logging
+import sys
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
 
+from src.events.bus import Event
 from src.events.types import TaskProgressEvent, TaskTimeoutEvent
-from src.tasks.heartbeat import HeartbeatService
+from src.tasks.heartbeat import DEFAULT_STAGE, HeartbeatService
 from src.tasks.models import BackgroundTask
 
 
+class FakeRepo:
+    """Task repository returning queued responses, then None.
+
+    Exception instances in the queue are raised instead of returned.
+    """
+
+    def __init__(self, responses: list[BackgroundTask | Exception]) -> None:
+        self._responses = list(responses)
+
+    async def get(self, task_id: str) -> BackgroundTask | None:
+        if not self._responses:
+            return None
+        response = self._responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeBus:
+    """Event bus that records published events."""
+
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+        self.published = asyncio.Event()
+
+    async def publish(self, event: Event) -> None:
+        self.events.append(event)
+        self.published.set()
+
+
+# Shared defaults; tests that depend on idle time pass their own timestamps
+_DEFAULT_NOW = datetime.now(UTC)
+_DEFAULT_PATH = Path("/projects/myapp")
+
+
 def _make_task(
     task_id: str = "task-001",
     status: str = "running",
     last_output: str | None = None,
-    created_at: datetime | None = None,
-    last_activity_at: datetime | None = None,
+    created_at: datetime = _DEFAULT_NOW,
+    last_activity_at: datetime = _DEFAULT_NOW,
     chat_id: int = 100,
     message_thread_id: int | None = None,
     total_cost: float = 0.25,
 ) -> BackgroundTask:
     """Helper to build a BackgroundTask with sensible defaults."""
-    now = datetime.now(UTC)
     return BackgroundTask(
         task_id=task_id,
         user_id=42,
-        project_path=Path("/projects/myapp"),
+        project_path=_DEFAULT_PATH,
         prompt="Fix the bug",
         status=status,
-        created_at=created_at or now,
-        last_activity_at=last_activity_at or now,
+        created_at=created_at,
+        last_activity_at=last_activity_at,
         last_output=last_output,
         chat_id=chat_id,
         message_thread_id=message_thread_id,
@@ -39,36 +76,46 @@ def _make_task(
     )
 
 
+# (output text, expected stage) pairs covering every stage pattern
+STAGE_CASES = [
+    ("Read file src/main.py", "исследует код"),
+    ("Glob pattern **/*.ts", "исследует код"),
+    ("Grep for errors", "исследует код"),
+    ("Searching for config", "исследует код"),
+    ("Write new module", "пишет код"),
+    ("Edit src/utils.py", "пишет код"),
+    ("creating file tests/test_new.py", "пишет код"),
+    ("pytest tests/ -v", "запускает тесты"),
+    ("npm test", "запускает тесты"),
+    ("jest --coverage", "запускает тесты"),
+    ("make test", "запускает тесты"),
+    ("git commit -m 'fix'", "коммитит"),
+    ("git push origin main", "коммитит"),
+    ("thinking about approach", "планирует"),
+    ("planning the implementation", "планирует"),
+    ("analyzing the codebase", "планирует"),
+    ("pip install requests", "устанавливает зависимости"),
+    ("npm install lodash", "устанавливает зависимости"),
+    ("poetry add fastapi", "устанавливает зависимости"),
+    # Matching is case-insensitive: output is lowercased before the keyword scan
+    ("GREP FOR ERRORS", "исследует код"),
+    ("RUNNING PYTEST", "запускает тесты"),
+    ("GIT PUSH ORIGIN MAIN", "коммитит"),
+]
+
+
 class TestParseStage:
     """Tests for HeartbeatService.parse_stage static method."""
 
-    @pytest.mark.parametrize(
-        "text, expected",
-        [
-            ("Read file src/main.py", "исследует код"),
-            ("Glob pattern **/*.ts", "исследует код"),
-            ("Grep for errors", "исследует код"),
-            ("Searching for config", "исследует код"),
-            ("Write new module", "пишет код"),
-            ("Edit src/utils.py", "пишет код"),
-            ("creating file tests/test_new.py", "пишет код"),
-            ("pytest tests/ -v", "запускает тесты"),
-            ("npm test", "запускает тесты"),
-            ("jest --coverage", "запускает тесты"),
-            ("make test", "запускает тесты"),
-            ("git commit -m 'fix'", "коммитит"),
-            ("git push origin main", "коммитит"),
-            ("thinking about approach", "планирует"),
-            ("planning the implementation", "планирует"),
-            ("analyzing the codebase", "планирует"),
-            ("pip install requests", "устанавливает зависимости"),
-            ("npm install lodash", "устанавливает зависимости"),
-            ("poetry add fastapi", "устанавливает зависимости"),
-        ],
-    )
-    def test_stage_detection(self, text: str, expected: str) -> None:
+    def test_stage_detection(self) -> None:
         """parse_stage returns correct stage for each keyword pattern."""
-        assert HeartbeatService.parse_stage(text) == expected
+        for text, expected in STAGE_CASES:
+            assert HeartbeatService.parse_stage(text) == expected, text
+
+    def test_stage_priority_beats_text_position(self) -> None:
+        """parse_stage prefers the higher-priority stage, wherever it appears."""
+        assert HeartbeatService.parse_stage("Running pytest after Edit") == "пишет код"
+        assert HeartbeatService.parse_stage("npm test\nRead log") == "исследует код"
 
     def test_none_returns_default(self) -> None:
         """parse_stage returns default for None input."""
@@ -82,17 +129,31 @@ class TestParseStage:
         """parse_stage returns default for text matching no pattern."""
         assert HeartbeatService.parse_stage("doing something unusual") == "работает"
 
+    def test_returns_interned_labels(self) -> None:
+        """parse_stage returns interned labels, so identity checks hold."""
+        assert HeartbeatService.parse_stage("Read file") is sys.intern("исследует код")
+        assert HeartbeatService.parse_stage(None) is DEFAULT_STAGE
+        assert HeartbeatService.parse_stage("idle") is sys.intern("работает")
+
+
+@pytest.fixture(scope="class")
+def service() -> HeartbeatService:
+    """Create one HeartbeatService with mock dependencies per test class."""
+    repo = AsyncMock()
+    repo.get = AsyncMock(return_value=None)
+    event_bus = AsyncMock()
+    return HeartbeatService(repo, event_bus, interval=0.05, timeout=0.2)
+
 
 class TestStartStop:
     """Tests for start/stop/stop_all lifecycle methods."""
 
-    @pytest.fixture
-    def service(self) -> HeartbeatService:
-        """Create a HeartbeatService with mock dependencies."""
-        repo = AsyncMock()
-        repo.get = AsyncMock(return_value=None)
-        event_bus = AsyncMock()
-        return HeartbeatService(repo, event_bus, interval=0.05, timeout=0.2)
+    @pytest.fixture(autouse=True)
+    def reset_service(self, service: HeartbeatService) -> None:
+        """Give each test clean mocks and no tracked heartbeat tasks."""
+        service._repo.reset_mock()
+        service._event_bus.reset_mock()
+        service._tasks.clear()
 
     async def test_start_creates_task(self, service: HeartbeatService) -> None:
         """start() creates an asyncio task in _tasks dict."""
@@ -130,37 +191,68 @@ class TestStartStop:
         await service.stop_all()
         assert len(service._tasks) == 0
 
+    async def test_stop_all_many_tasks(self, service: HeartbeatService) -> None:
+        """stop_all() cancels every loop at once, leaving none running."""
+        for i in range(50):
+            await service.start(f"task-{i:03d}")
+        started = list(service._tasks.values())
+        assert len(started) == 50
+
+        await service.stop_all()
+        assert len(service._tasks) == 0
+        assert all(t.cancelled() for t in started)
+
+    async def test_stop_all_logs_loop_errors(
+        self, service: HeartbeatService, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """stop_all() logs errors raised by loops, but not their cancellation."""
+
+        async def fails_on_cancel() -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                raise RuntimeError("cleanup failed")
+
+        service._tasks["bad"] = asyncio.create_task(
+            fails_on_cancel(), name="heartbeat-bad"
+        )
+        await service.start("task-001")
+        await asyncio.sleep(0)
 
+        with caplog.at_level(logging.ERROR, logger="src.tasks.heartbeat"):
+            await service.stop_all()
+
+        assert [r.getMessage() for r in caplog.records] == [
+            "heartbeat-bad failed while stopping"
+        ]
+        assert isinstance(caplog.records[0].exc_info[1], RuntimeError)
+
+
+@pytest.mark.timeout(5)
 class TestHeartbeatLoop:
-    """Tests for the heartbeat _loop behavior with mocked repo and event_bus."""
+    """Tests for the heartbeat _loop behavior with fake repo and event_bus."""
 
     async def test_emits_progress_event(self) -> None:
         """Loop emits TaskProgressEvent when task is running."""
+        now = datetime.now(UTC)
         task = _make_task(
-            created_at=datetime.now(UTC) - timedelta(seconds=30),
+            created_at=now - timedelta(seconds=30),
+            last_activity_at=now,
             last_output="Grep for patterns",
         )
-        repo = AsyncMock()
         # First call returns running task, second returns completed to stop loop
-        repo.get = AsyncMock(
-            side_effect=[task, _make_task(status="completed")]
-        )
-        event_bus = AsyncMock()
-        event_bus.publish = AsyncMock()
+        repo = FakeRepo([task, _make_task(status="completed")])
+        bus = FakeBus()
 
-        service = HeartbeatService(repo, event_bus, interval=0.05, timeout=300.0)
+        service = HeartbeatService(repo, bus, interval=0.001, timeout=300.0)
         await service.start("task-001")
 
-        # Wait for loop to process
-        await asyncio.sleep(0.2)
+        # Wait until the loop has published
+        await asyncio.wait_for(bus.published.wait(), timeout=2.0)
         await service.stop("task-001")
 
         # Verify at least one progress event was published
-        published_events = [
-            call.args[0]
-            for call in event_bus.publish.call_args_list
-            if isinstance(call.args[0], TaskProgressEvent)
-        ]
+        published_events = [e for e in bus.events if isinstance(e, TaskProgressEvent)]
         assert len(published_events) >= 1
         event = published_events[0]
         assert event.task_id == "task-001"
@@ -176,23 +268,16 @@ class TestHeartbeatLoop:
             chat_id=200,
             message_thread_id=5,
         )
-        repo = AsyncMock()
-        repo.get = AsyncMock(return_value=task)
-        event_bus = AsyncMock()
-        event_bus.publish = AsyncMock()
+        repo = FakeRepo([task])
+        bus = FakeBus()
 
-        service = HeartbeatService(repo, event_bus, interval=0.05, timeout=0.01)
+        service = HeartbeatService(repo, bus, interval=0.001, timeout=0.01)
         await service.start("task-001")
 
-        await asyncio.sleep(0.2)
-        # Loop should have broken after emitting timeout
-        await service.stop("task-001")
+        # Loop should break on its own after emitting timeout
+        await asyncio.wait_for(service._tasks["task-001"], timeout=2.0)
 
-        published_events = [
-            call.args[0]
-            for call in event_bus.publish.call_args_list
-            if isinstance(call.args[0], TaskTimeoutEvent)
-        ]
+        published_events = [e for e in bus.events if isinstance(e, TaskTimeoutEvent)]
         assert len(published_events) >= 1
         event = published_events[0]
         assert event.task_id == "task-001"
@@ -202,41 +287,38 @@ class TestHeartbeatLoop:
 
     async def test_loop_stops_when_task_not_running(self) -> None:
         """Loop exits when task status is no longer 'running'."""
-        repo = AsyncMock()
-        repo.get = AsyncMock(return_value=_make_task(status="completed"))
-        event_bus = AsyncMock()
+        repo = FakeRepo([_make_task(status="completed")])
+        bus = FakeBus()
 
-        service = HeartbeatService(repo, event_bus, interval=0.05, timeout=300.0)
+        service = HeartbeatService(repo, bus, interval=0.001, timeout=300.0)
         await service.start("task-001")
 
-        await asyncio.sleep(0.15)
+        await asyncio.wait_for(service._tasks["task-001"], timeout=2.0)
         # Task should have been removed from _tasks after loop exited
         assert "task-001" not in service._tasks
         # No events should have been published
-        event_bus.publish.assert_not_called()
+        assert bus.events == []
 
     async def test_loop_stops_when_task_not_found(self) -> None:
         """Loop exits when repo.get returns None."""
-        repo = AsyncMock()
-        repo.get = AsyncMock(return_value=None)
-        event_bus = AsyncMock()
+        repo = FakeRepo([])
+        bus = FakeBus()
 
-        service = HeartbeatService(repo, event_bus, interval=0.05, timeout=300.0)
+        service = HeartbeatService(repo, bus, interval=0.001, timeout=300.0)
         await service.start("task-001")
 
-        await asyncio.sleep(0.15)
+        await asyncio.wait_for(service._tasks["task-001"], timeout=2.0)
         assert "task-001" not in service._tasks
-        event_bus.publish.assert_not_called()
+        assert bus.events == []
 
     async def test_loop_cleans_up_on_exception(self) -> None:
         """Loop removes itself from _tasks even on unexpected errors."""
-        repo = AsyncMock()
-        repo.get = AsyncMock(side_effect=RuntimeError("DB gone"))
-        event_bus = AsyncMock()
+        repo = FakeRepo([RuntimeError("DB gone")])
+        bus = FakeBus()
 
-        service = HeartbeatService(repo, event_bus, interval=0.05, timeout=300.0)
+        service = HeartbeatService(repo, bus, interval=0.001, timeout=300.0)
         await service.start("task-001")
 
-        await asyncio.sleep(0.15)
+        await asyncio.wait_for(service._tasks["task-001"], timeout=2.0)
         # Task should have been removed via finally block
         assert "task-001" not in service._tasks
@@ -1,8 +1,10 @@
 """Tests for TaskManager lifecycle management."""
 
 import asyncio
+from dataclasses import dataclass, replace
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any, Callable
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -13,106 +15,215 @@ from src.events.types import (
     TaskStartedEvent,
 )
 from src.llm.interface import LLMResponse
+from src.tasks import manager as manager_module
 from src.tasks.manager import CostLimitExceeded, TaskManager
 from src.tasks.models import BackgroundTask
 
+# Keep the module on one xdist worker so its module-scoped mocks are built once
+pytestmark = pytest.mark.xdist_group(name="task_manager")
+
+# Provider responses shared by every test; TaskManager only reads them
+_OK_RESPONSE = LLMResponse(
+    content="Task completed successfully",
+    session_id="sess-123",
+    cost=0.50,
+    duration_ms=5000,
+    num_turns=3,
+    is_error=False,
+)
+_ERR_RESPONSE = LLMResponse(
+    content="",
+    session_id=None,
+    cost=0.0,
+    duration_ms=0,
+    num_turns=0,
+    is_error=True,
+    error_message="Model overloaded",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FakeSettings:
+    """The settings fields TaskManager reads, with test defaults."""
+
+    max_concurrent_tasks: int = 3
+    task_max_cost: float = 10.0
+    task_max_duration_seconds: int = 3600
+    task_retry_delay_seconds: float = 0
+    model_background: str | None = None
 
-def _make_settings(**overrides: object) -> MagicMock:
-    """Create a mock settings object with sensible defaults."""
-    settings = MagicMock()
-    settings.max_concurrent_tasks = overrides.get("max_concurrent_tasks", 3)
-    settings.task_max_cost = overrides.get("task_max_cost", 10.0)
-    settings.task_max_duration_seconds = overrides.get(
-        "task_max_duration_seconds", 3600
-    )
-    return settings
 
+def _make_settings(**overrides: Any) -> FakeSettings:
+    """Create a settings object with sensible defaults."""
+    return replace(FakeSettings(), **overrides)
 
-def _make_task(
-    task_id: str = "abcd1234",
-    status: str = "running",
-    project_path: Path | None = None,
-    **kwargs: object,
-) -> BackgroundTask:
+
+# Frozen clock shared by the task template and TaskManager (see _frozen_now)
+_FIXED_NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+# Built once at import; _make_task copies it with per-test overrides
+_TEMPLATE_TASK = BackgroundTask(
+    task_id="abcd1234",
+    user_id=42,
+    project_path=Path("/projects/myapp"),
+    prompt="Fix the bug",
+    status="running",
+    chat_id=100,
+    message_thread_id=None,
+    created_at=_FIXED_NOW,
+    last_activity_at=_FIXED_NOW,
+)
+
+
+def _make_task(**overrides: Any) -> BackgroundTask:
     """Helper to build a BackgroundTask with sensible defaults."""
-    defaults: dict = dict(
-        task_id=task_id,
-        user_id=42,
-        project_path=project_path or Path("/projects/myapp"),
-        prompt="Fix the bug",
-        status=status,
-        chat_id=100,
-        message_thread_id=None,
-        created_at=datetime.now(UTC),
-        last_activity_at=datetime.now(UTC),
-    )
-    defaults.update(kwargs)
-    return BackgroundTask(**defaults)
+    return _TEMPLATE_TASK.model_copy(update=overrides)
 
 
-@pytest.fixture
+def _configure_provider(mock: AsyncMock) -> None:
+    """Apply the default provider behavior: one successful response."""
+    mock.execute.return_value = _OK_RESPONSE
+
+
+class _Recorder:
+    """Base for async stubs that record each call as (method, args, kwargs)."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+    def calls_to(self, name: str) -> list[tuple[tuple[Any, ...], dict[str, Any]]]:
+        """Return the (args, kwargs) of every call to one method, in order."""
+        return [(args, kwargs) for n, args, kwargs in self.calls if n == name]
+
+    def _record(self, name: str, *args: Any, **kwargs: Any) -> None:
+        self.calls.append((name, args, kwargs))
+
+
+class FakeRepo(_Recorder):
+    """Task repository stub; query results come from ``returns``."""
+
+    def reset(self) -> None:
+        super().reset()
+        # Default: no tasks stored or running
+        self.returns: dict[str, Any] = {
+            "get": None,
+            "get_running_for_project": None,
+            "get_all_running": [],
+            "count_running": 0,
+            "get_last_completed": None,
+        }
+
+    async def create(self, task: BackgroundTask) -> None:
+        self._record("create", task)
+
+    async def get(self, task_id: str) -> BackgroundTask | None:
+        self._record("get", task_id)
+        return self.returns["get"]
+
+    async def update_status(self, task_id: str, status: str, **kwargs: Any) -> None:
+        self._record("update_status", task_id, status, **kwargs)
+
+    async def update_progress(
+        self, task_id: str, cost: float, last_output: str | None = None
+    ) -> None:
+        self._record("update_progress", task_id, cost, last_output)
+
+    async def get_running_for_project(
+        self, project_path: Path
+    ) -> BackgroundTask | None:
+        self._record("get_running_for_project", project_path)
+        return self.returns["get_running_for_project"]
+
+    async def get_all_running(self) -> list[BackgroundTask]:
+        self._record("get_all_running")
+        return self.returns["get_all_running"]
+
+    async def count_running(self) -> int:
+        self._record("count_running")
+        return self.returns["count_running"]
+
+    async def get_last_completed(self, project_path: Path) -> BackgroundTask | None:
+        self._record("get_last_completed", project_path)
+        return self.returns["get_last_completed"]
+
+
+class FakeHeartbeat(_Recorder):
+    """Heartbeat service stub."""
+
+    async def start(self, task_id: str) -> None:
+        self._record("start", task_id)
+
+    async def stop(self, task_id: str) -> None:
+        self._record("stop", task_id)
+
+    async def stop_all(self) -> None:
+        self._record("stop_all")
+
+
+@pytest.fixture(scope="module")
 def provider() -> AsyncMock:
     """Mock LLM provider."""
     mock = AsyncMock()
-    mock.execute = AsyncMock(
-        return_value=LLMResponse(
-            content="Task completed successfully",
-            session_id="sess-123",
-            cost=0.50,
-            duration_ms=5000,
-            num_turns=3,
-            is_error=False,
-        )
-    )
+    _configure_provider(mock)
     return mock
 
 
-@pytest.fixture
-def repo() -> AsyncMock:
-    """Mock task repository."""
-    mock = AsyncMock()
-    mock.create = AsyncMock()
-    mock.get = AsyncMock(return_value=None)
-    mock.update_status = AsyncMock()
-    mock.update_progress = AsyncMock()
-    mock.get_running_for_project = AsyncMock(return_value=None)
-    mock.get_all_running = AsyncMock(return_value=[])
-    mock.count_running = AsyncMock(return_value=0)
-    mock.get_last_completed = AsyncMock(return_value=None)
-    return mock
+@pytest.fixture(scope="module")
+def repo() -> FakeRepo:
+    """Stub task repository."""
+    return FakeRepo()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def event_bus() -> AsyncMock:
     """Mock event bus."""
-    mock = AsyncMock()
-    mock.publish = AsyncMock()
-    return mock
+    return AsyncMock()
 
 
-@pytest.fixture
-def heartbeat() -> AsyncMock:
-    """Mock heartbeat service."""
-    mock = AsyncMock()
-    mock.start = AsyncMock()
-    mock.stop = AsyncMock()
-    mock.stop_all = AsyncMock()
-    return mock
+@pytest.fixture(scope="module")
+def heartbeat() -> FakeHeartbeat:
+    """Stub heartbeat service."""
+    return FakeHeartbeat()
+
+
+@pytest.fixture(autouse=True)
+def _frozen_now(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Pin TaskManager's clock to _FIXED_NOW."""
+    monkeypatch.setattr(manager_module, "_now", lambda: _FIXED_NOW)
+
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(
+    provider: AsyncMock,
+    repo: FakeRepo,
+    event_bus: AsyncMock,
+    heartbeat: FakeHeartbeat,
+) -> None:
+    """Give each test clean module-scoped doubles with default return values."""
+    for mock in (provider, event_bus):
+        mock.reset_mock(return_value=True, side_effect=True)
+    _configure_provider(provider)
+    repo.reset()
+    heartbeat.reset()
 
 
 @pytest.fixture
-def settings() -> MagicMock:
-    """Mock settings."""
+def settings() -> FakeSettings:
+    """Stub settings."""
     return _make_settings()
 
 
 @pytest.fixture
 def manager(
     provider: AsyncMock,
-    repo: AsyncMock,
+    repo: FakeRepo,
     event_bus: AsyncMock,
-    heartbeat: AsyncMock,
-    settings: MagicMock,
+    heartbeat: FakeHeartbeat,
+    settings: FakeSettings,
 ) -> TaskManager:
     """Create TaskManager with all mocked dependencies."""
     return TaskManager(
@@ -144,7 +255,7 @@ class TestStartTask:
     async def test_start_task_creates_db_record(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
+        repo: FakeRepo,
     ) -> None:
         """start_task creates a BackgroundTask record in the repository."""
         task_id = await manager.start_task(
@@ -156,8 +267,7 @@ class TestStartTask:
             session_id="sess-old",
         )
 
-        repo.create.assert_called_once()
-        created_task = repo.create.call_args[0][0]
+        [((created_task,), _)] = repo.calls_to("create")
         assert isinstance(created_task, BackgroundTask)
         assert created_task.task_id == task_id
         assert created_task.user_id == 42
@@ -192,7 +302,7 @@ class TestStartTask:
     async def test_start_task_starts_heartbeat(
         self,
         manager: TaskManager,
-        heartbeat: AsyncMock,
+        heartbeat: FakeHeartbeat,
     ) -> None:
         """start_task starts heartbeat monitoring for the task."""
         task_id = await manager.start_task(
@@ -202,7 +312,7 @@ class TestStartTask:
             chat_id=100,
         )
 
-        heartbeat.start.assert_called_once_with(task_id)
+        assert heartbeat.calls_to("start") == [((task_id,), {})]
 
     async def test_start_task_stores_asyncio_task(
         self, manager: TaskManager
@@ -228,11 +338,11 @@ class TestStartTask:
     async def test_start_task_rejects_busy_project(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
+        repo: FakeRepo,
     ) -> None:
         """start_task raises ValueError if project already has a running task."""
         existing_task = _make_task(task_id="existing1")
-        repo.get_running_for_project.return_value = existing_task
+        repo.returns["get_running_for_project"] = existing_task
 
         with pytest.raises(ValueError, match="already has a running task"):
             await manager.start_task(
@@ -243,15 +353,15 @@ class TestStartTask:
             )
 
         # No DB record should be created
-        repo.create.assert_not_called()
+        assert repo.calls_to("create") == []
 
     async def test_start_task_rejects_max_concurrent(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
+        repo: FakeRepo,
     ) -> None:
         """start_task raises ValueError when max concurrent tasks reached."""
-        repo.count_running.return_value = 3  # Equal to max_concurrent_tasks
+        repo.returns["count_running"] = 3  # Equal to max_concurrent_tasks
 
         with pytest.raises(ValueError, match="Maximum concurrent tasks"):
             await manager.start_task(
@@ -261,7 +371,7 @@ class TestStartTask:
                 chat_id=100,
             )
 
-        repo.create.assert_not_called()
+        assert repo.calls_to("create") == []
 
 
 class TestStopTask:
@@ -270,103 +380,100 @@ class TestStopTask:
     async def test_stop_task_cancels_and_updates_db(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
-        heartbeat: AsyncMock,
+        repo: FakeRepo,
+        heartbeat: FakeHeartbeat,
     ) -> None:
         """stop_task cancels the asyncio task, stops heartbeat, updates DB."""
-        # Create a long-running coroutine to cancel
-        async def slow_task() -> None:
-            await asyncio.sleep(3600)
-
+        # A never-resolved future stands in for the running task
         task_id = "test1234"
-        asyncio_task = asyncio.create_task(slow_task())
-        manager._running_tasks[task_id] = asyncio_task
+        pending = asyncio.get_running_loop().create_future()
+        manager._running_tasks[task_id] = pending  # type: ignore[assignment]
 
         await manager.stop_task(task_id)
 
-        # Task should be removed from running
+        # Task should be cancelled and removed from running
+        assert pending.cancelled()
         assert task_id not in manager._running_tasks
         # Heartbeat should be stopped
-        heartbeat.stop.assert_called_once_with(task_id)
+        assert heartbeat.calls_to("stop") == [((task_id,), {})]
         # DB should be updated to stopped
-        repo.update_status.assert_called_once_with(task_id, "stopped")
+        assert repo.calls_to("update_status") == [((task_id, "stopped"), {})]
 
     async def test_stop_task_nonexistent_is_safe(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
-        heartbeat: AsyncMock,
+        repo: FakeRepo,
+        heartbeat: FakeHeartbeat,
     ) -> None:
         """stop_task on a non-existent task_id does not raise."""
         await manager.stop_task("nonexistent")
 
-        heartbeat.stop.assert_called_once_with("nonexistent")
-        repo.update_status.assert_called_once_with("nonexistent", "stopped")
+        assert heartbeat.calls_to("stop") == [(("nonexistent",), {})]
+        assert repo.calls_to("update_status") == [
+            (("nonexistent", "stopped"), {})
+        ]
 
 
 class TestQueryMethods:
     """Tests for has_running_task, get_running_task, get_all_running, etc."""
 
     async def test_has_running_task_true(
-        self, manager: TaskManager, repo: AsyncMock
+        self, manager: TaskManager, repo: FakeRepo
     ) -> None:
         """has_running_task returns True when project has a running task."""
-        repo.get_running_for_project.return_value = _make_task()
+        repo.returns["get_running_for_project"] = _make_task()
 
         result = await manager.has_running_task(Path("/projects/myapp"))
         assert result is True
 
     async def test_has_running_task_false(
-        self, manager: TaskManager, repo: AsyncMock
+        self, manager: TaskManager, repo: FakeRepo
     ) -> None:
         """has_running_task returns False when no running task exists."""
-        repo.get_running_for_project.return_value = None
+        repo.returns["get_running_for_project"] = None
 
         result = await manager.has_running_task(Path("/projects/myapp"))
         assert result is False
 
-    async def test_get_running_task(
-        self, manager: TaskManager, repo: AsyncMock
-    ) -> None:
-        """get_running_task delegates to repo."""
-        expected = _make_task()
-        repo.get_running_for_project.return_value = expected
-
-        result = await manager.get_running_task(Path("/projects/myapp"))
-        assert result is expected
-
-    async def test_get_all_running(
-        self, manager: TaskManager, repo: AsyncMock
-    ) -> None:
-        """get_all_running delegates to repo.get_all_running."""
-        tasks = [_make_task(task_id="t1"), _make_task(task_id="t2")]
-        repo.get_all_running.return_value = tasks
-
-        result = await manager.get_all_running()
-        assert result == tasks
-        repo.get_all_running.assert_called_once()
-
-    async def test_get_task(
-        self, manager: TaskManager, repo: AsyncMock
+    @pytest.mark.parametrize(
+        "manager_method,repo_method,args,expected",
+        [
+            (
+                "get_running_task",
+                "get_running_for_project",
+                (Path("/projects/myapp"),),
+                _make_task(),
+            ),
+            (
+                "get_all_running",
+                "get_all_running",
+                (),
+                [_make_task(task_id="t1"), _make_task(task_id="t2")],
+            ),
+            ("get_task", "get", ("abcd1234",), _make_task()),
+            (
+                "get_task_for_continue",
+                "get_last_completed",
+                (Path("/projects/myapp"),),
+                _make_task(status="completed"),
+            ),
+        ],
+    )
+    async def test_delegates_to_repo(
+        self,
+        manager: TaskManager,
+        repo: FakeRepo,
+        manager_method: str,
+        repo_method: str,
+        args: tuple[Any, ...],
+        expected: Any,
     ) -> None:
-        """get_task delegates to repo.get."""
-        expected = _make_task()
-        repo.get.return_value = expected
+        """Query methods return the repo result for the same arguments."""
+        repo.returns[repo_method] = expected
 
-        result = await manager.get_task("abcd1234")
+        result = await getattr(manager, manager_method)(*args)
         assert result is expected
-        repo.get.assert_called_once_with("abcd1234")
-
-    async def test_get_task_for_continue(
-        self, manager: TaskManager, repo: AsyncMock
-    ) -> None:
-        """get_task_for_continue delegates to repo.get_last_completed."""
-        completed = _make_task(status="completed")
-        repo.get_last_completed.return_value = completed
-
-        result = await manager.get_task_for_continue(Path("/projects/myapp"))
-        assert result is completed
-        repo.get_last_completed.assert_called_once_with(Path("/projects/myapp"))
+        assert repo.calls_to(repo_method) == [(args, {})]
 
 
 class TestRecover:
@@ -375,40 +482,40 @@ class TestRecover:
     async def test_recover_marks_orphaned_tasks_as_failed(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
+        repo: FakeRepo,
     ) -> None:
         """recover marks all running tasks as failed with restart message."""
         orphaned = [
             _make_task(task_id="t1"),
             _make_task(task_id="t2", project_path=Path("/projects/other")),
         ]
-        repo.get_all_running.return_value = orphaned
+        repo.returns["get_all_running"] = orphaned
 
         await manager.recover()
 
-        assert repo.update_status.call_count == 2
+        calls = repo.calls_to("update_status")
+        assert len(calls) == 2
 
         # Verify both tasks were marked as failed
-        calls = repo.update_status.call_args_list
-        for call in calls:
-            assert call[0][1] == "failed"
-            assert "перезапущен" in call[1]["error_message"]
+        for args, kwargs in calls:
+            assert args[1] == "failed"
+            assert "перезапущен" in kwargs["error_message"]
 
         # Verify task IDs
-        recovered_ids = {call[0][0] for call in calls}
+        recovered_ids = {args[0] for args, _ in calls}
         assert recovered_ids == {"t1", "t2"}
 
     async def test_recover_no_orphaned_tasks(
         self,
         manager: TaskManager,
-        repo: AsyncMock,
+        repo: FakeRepo,
     ) -> None:
         """recover does nothing when no orphaned tasks exist."""
-        repo.get_all_running.return_value = []
+        repo.returns["get_all_running"] = []
 
         await manager.recover()
 
-        repo.update_status.assert_not_called()
+        assert repo.calls_to("update_status") == []
 
 
 class TestRunTask:
@@ -418,9 +525,9 @@ class TestRunTask:
         self,
         manager: TaskManager,
         provider: AsyncMock,
-        repo: AsyncMock,
+        repo: FakeRepo,
         event_bus: AsyncMock,
-        heartbeat: AsyncMock,
+        heartbeat: FakeHeartbeat,
     ) -> None:
         """Successful _run_task marks task completed and publishes event."""
         task = _make_task()
@@ -431,42 +538,39 @@ class TestRunTask:
             await manager._run_task(task)
 
         # DB should be updated to completed
-        repo.update_status.assert_called_once()
-        call_args = repo.update_status.call_args
-        assert call_args[0][0] == task.task_id
-        assert call_args[0][1] == "completed"
-        assert "result_summary" in call_args[1]
-        assert call_args[1]["session_id"] == "sess-123"
+        [(args, kwargs)] = repo.calls_to("update_status")
+        assert args[0] == task.task_id
+        assert args[1] == "completed"
+        assert "result_summary" in kwargs
+        assert kwargs["session_id"] == "sess-123"
 
         # Completed event should be published
         event_bus.publish.assert_called_once()
         event = event_bus.publish.call_args[0][0]
         assert isinstance(event, TaskCompletedEvent)
         assert event.task_id == task.task_id
+        assert event.duration_seconds == 0
 
     async def test_provider_error_triggers_retry_then_fail(
         self,
         manager: TaskManager,
         provider: AsyncMock,
-        repo: AsyncMock,
+        repo: FakeRepo,
         event_bus: AsyncMock,
     ) -> None:
         """When provider raises, _run_task retries once then fails."""
         provider.execute.side_effect = RuntimeError("Connection lost")
         task = _make_task()
 
-        # Patch RETRY_DELAY_SECONDS to avoid waiting
-        with patch("src.tasks.manager.RETRY_DELAY_SECONDS", 0):
-            await manager._run_task(task)
+        await manager._run_task(task)
 
         # Provider should have been called twice (initial + retry)
         assert provider.execute.call_count == 2
 
         # DB should be updated to failed
-        repo.update_status.assert_called_once()
-        call_args = repo.update_status.call_args
-        assert call_args[0][1] == "failed"
-        assert "Connection lost" in call_args[1]["error_message"]
+        [(args, kwargs)] = repo.calls_to("update_status")
+        assert args[1] == "failed"
+        assert "Connection lost" in kwargs["error_message"]
 
         # Failed event should be published
         event_bus.publish.assert_called_once()
@@ -478,28 +582,19 @@ class TestRunTask:
         self,
         manager: TaskManager,
         provider: AsyncMock,
-        repo: AsyncMock,
+        repo: FakeRepo,
         event_bus: AsyncMock,
     ) -> None:
         """When LLM returns is_error=True, _run_task retries once then fails."""
-        provider.execute.return_value = LLMResponse(
-            content="",
-            session_id=None,
-            cost=0.0,
-            duration_ms=0,
-            num_turns=0,
-            is_error=True,
-            error_message="Model overloaded",
-        )
+        provider.execute.return_value = _ERR_RESPONSE
         task = _make_task()
 
-        with patch("src.tasks.manager.RETRY_DELAY_SECONDS", 0):
-            await manager._run_task(task)
+        await manager._run_task(task)
 
         assert provider.execute.call_count == 2
 
-        repo.update_status.assert_called_once()
-        assert repo.update_status.call_args[0][1] == "failed"
+        [(args, _)] = repo.calls_to("update_status")
+        assert args[1] == "failed"
 
         event_bus.publish.assert_called_once()
         event = event_bus.publish.call_args[0][0]
@@ -509,7 +604,7 @@ class TestRunTask:
         self,
         manager: TaskManager,
         provider: AsyncMock,
-        repo: AsyncMock,
+        repo: FakeRepo,
         event_bus: AsyncMock,
     ) -> None:
         """CostLimitExceeded fails immediately without retry."""
@@ -535,7 +630,7 @@ class TestRunTask:
                 is_error=False,
             )
 
-        provider.execute = AsyncMock(side_effect=execute_with_cost_overrun)
+        provider.execute.side_effect = execute_with_cost_overrun
         task = _make_task()
 
         await manager._run_task(task)
@@ -544,9 +639,9 @@ class TestRunTask:
         assert provider.execute.call_count == 1
 
         # DB should be updated to failed
-        repo.update_status.assert_called_once()
-        assert repo.update_status.call_args[0][1] == "failed"
-        assert "cost limit" in repo.update_status.call_args[1]["error_message"].lower()
+        [(args, kwargs)] = repo.calls_to("update_status")
+        assert args[1] == "failed"
+        assert "cost limit" in kwargs["error_message"].lower()
 
         # Failed event published
         event_bus.publish.assert_called_once()
@@ -572,7 +667,7 @@ class TestRunTask:
         self,
         manager: TaskManager,
         provider: AsyncMock,
-        repo: AsyncMock,
+        repo: FakeRepo,
         event_bus: AsyncMock,
     ) -> None:
         """Successful _run_task calls _collect_commits and includes in result."""
@@ -588,8 +683,8 @@ class TestRunTask:
             await manager._run_task(task)
 
         # Commits should be passed to update_status
-        call_args = repo.update_status.call_args
-        assert call_args[1]["commits"] == commits
+        [(_, kwargs)] = repo.calls_to("update_status")
+        assert kwargs["commits"] == commits
 
         # Commits should be in the completed event
         event = event_bus.publish.call_args[0][0]
@@ -615,61 +710,81 @@ class TestCostLimitExceeded:
         assert "$10.00" in str(exc)
 
 
+class _FakeProc:
+    """Finished subprocess with canned output."""
+
+    def __init__(self, stdout: bytes, stderr: bytes, returncode: int) -> None:
+        self._stdout = stdout
+        self._stderr = stderr
+        self.returncode = returncode
+
+    async def communicate(self) -> tuple[bytes, bytes]:
+        return self._stdout, self._stderr
+
+
 class TestCollectCommits:
     """Tests for _collect_commits."""
 
+    @pytest.fixture
+    def patched_subprocess(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> Callable[..., None]:
+        """Return a setter that fakes asyncio.create_subprocess_exec for git."""
+
+        def _set(
+            stdout: bytes = b"",
+            stderr: bytes = b"",
+            returncode: int = 0,
+            exc: Exception | None = None,
+        ) -> None:
+            if exc is not None:
+                fake_exec = AsyncMock(side_effect=exc)
+            else:
+                proc = _FakeProc(stdout, stderr, returncode)
+                fake_exec = AsyncMock(return_value=proc)
+            monkeypatch.setattr("asyncio.create_subprocess_exec", fake_exec)
+
+        return _set
+
     async def test_collect_commits_parses_output(
-        self, manager: TaskManager
+        self, manager: TaskManager, patched_subprocess: Callable[..., None]
     ) -> None:
         """_collect_commits parses git log output into commit dicts."""
-        mock_proc = AsyncMock()
-        mock_proc.communicate.return_value = (
-            b"abc1234 [claude] Fix bug\ndef5678 [claude] Add tests\n",
-            b"",
+        patched_subprocess(
+            stdout=b"abc1234 [claude] Fix bug\ndef5678 [claude] Add tests\n"
         )
-        mock_proc.returncode = 0
 
-        with patch(
-            "asyncio.create_subprocess_exec", return_value=mock_proc
-        ):
-            commits = await manager._collect_commits(
-                Path("/projects/myapp"),
-                datetime.now(UTC),
-            )
+        commits = await manager._collect_commits(
+            Path("/projects/myapp"),
+            _FIXED_NOW,
+        )
 
         assert len(commits) == 2
         assert commits[0] == {"sha": "abc1234", "message": "[claude] Fix bug"}
         assert commits[1] == {"sha": "def5678", "message": "[claude] Add tests"}
 
     async def test_collect_commits_empty_on_error(
-        self, manager: TaskManager
+        self, manager: TaskManager, patched_subprocess: Callable[..., None]
     ) -> None:
         """_collect_commits returns empty list on git error."""
-        mock_proc = AsyncMock()
-        mock_proc.communicate.return_value = (b"", b"fatal: not a git repository")
-        mock_proc.returncode = 128
+        patched_subprocess(stderr=b"fatal: not a git repository", returncode=128)
 
-        with patch(
-            "asyncio.create_subprocess_exec", return_value=mock_proc
-        ):
-            commits = await manager._collect_commits(
-                Path("/projects/myapp"),
-                datetime.now(UTC),
-            )
+        commits = await manager._collect_commits(
+            Path("/projects/myapp"),
+            _FIXED_NOW,
+        )
 
         assert commits == []
 
     async def test_collect_commits_handles_missing_git(
-        self, manager: TaskManager
+        self, manager: TaskManager, patched_subprocess: Callable[..., None]
     ) -> None:
         """_collect_commits returns empty list if git is not available."""
-        with patch(
-            "asyncio.create_subprocess_exec",
-            side_effect=FileNotFoundError("git not found"),
-        ):
-            commits = await manager._collect_commits(
-                Path("/projects/myapp"),
-                datetime.now(UTC),
-            )
+        patched_subprocess(exc=FileNotFoundError("git not found"))
+
+        commits = await manager._collect_commits(
+            Path("/projects/myapp"),
+            _FIXED_NOW,
+        )
 
         assert commits == []
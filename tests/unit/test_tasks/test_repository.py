@@ -1,54 +1,74 @@
 """Tests for TaskRepository."""
 
-import tempfile
-from datetime import UTC, datetime
+import sqlite3
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 import pytest
+import pytest_asyncio
 
 from src.storage.database import DatabaseManager
 from src.tasks.models import BackgroundTask
 from src.tasks.repository import TaskRepository
 
+# Run the tests on the same loop as the session-scoped database fixtures
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-@pytest.fixture
+_FIXED_NOW = datetime(2024, 1, 1, tzinfo=UTC)
+_DEFAULT_PROJECT = Path("/projects/myapp")
+_OTHER_PROJECT = Path("/projects/other")
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def db_manager():
-    """Create test database manager with migrations applied."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        db_path = Path(temp_dir) / "test.db"
-        manager = DatabaseManager(f"sqlite:///{db_path}")
-        await manager.initialize()
-        yield manager
-        await manager.close()
+    """Create one in-memory database with migrations applied for the session."""
+    manager = DatabaseManager("sqlite:///:memory:")
+    await manager.initialize()
+    yield manager
+    await manager.close()
 
 
-@pytest.fixture
-async def task_repo(db_manager):
-    """Create task repository."""
-    # background_tasks has a FK to users, so seed a user first
+@pytest_asyncio.fixture(scope="session", autouse=True, loop_scope="session")
+async def _seed_user(db_manager):
+    """Seed the task owner once; background_tasks has a FK to users."""
     async with db_manager.get_connection() as conn:
         await conn.execute(
-            "INSERT INTO users (user_id, telegram_username, is_allowed) VALUES (?, ?, ?)",
+            "INSERT OR IGNORE INTO users (user_id, telegram_username, is_allowed) "
+            "VALUES (?, ?, ?)",
             (42, "testuser", True),
         )
         await conn.commit()
+
+
+@pytest_asyncio.fixture(autouse=True, loop_scope="session")
+async def _clean_db(db_manager, _seed_user):
+    """Remove tasks left by the previous test, keeping the seeded user."""
+    async with db_manager.get_connection() as conn:
+        await conn.execute("DELETE FROM background_tasks")
+        await conn.commit()
+
+
+@pytest.fixture
+def task_repo(db_manager):
+    """Create task repository."""
     return TaskRepository(db_manager)
 
 
+_DEFAULT_TASK = BackgroundTask(
+    task_id="task-001",
+    user_id=42,
+    project_path=_DEFAULT_PROJECT,
+    prompt="Fix the bug",
+    status="running",
+    provider="anthropic",
+    created_at=_FIXED_NOW,
+    last_activity_at=_FIXED_NOW,
+)
+
+
 def _make_task(**overrides) -> BackgroundTask:
     """Helper to build a BackgroundTask with sensible defaults."""
-    defaults = dict(
-        task_id="task-001",
-        user_id=42,
-        project_path=Path("/projects/myapp"),
-        prompt="Fix the bug",
-        status="running",
-        provider="anthropic",
-        created_at=datetime.now(UTC),
-        last_activity_at=datetime.now(UTC),
-    )
-    defaults.update(overrides)
-    return BackgroundTask(**defaults)
+    return _DEFAULT_TASK.model_copy(update=overrides)
 
 
 class TestTaskRepository:
@@ -74,59 +94,34 @@ class TestTaskRepository:
         result = await task_repo.get("does-not-exist")
         assert result is None
 
-    async def test_update_status_completed(self, task_repo):
-        """update_status sets status, finished_at, and optional fields."""
-        task = _make_task()
-        await task_repo.create(task)
-
-        await task_repo.update_status(
-            "task-001",
-            "completed",
-            result_summary="All tests pass",
-            commits=[{"sha": "abc123", "message": "Fix bug"}],
-        )
-
-        updated = await task_repo.get("task-001")
-        assert updated is not None
-        assert updated.status == "completed"
-        assert updated.finished_at is not None
-        assert updated.result_summary == "All tests pass"
-        assert len(updated.commits) == 1
-        assert updated.commits[0]["sha"] == "abc123"
-
-    async def test_update_status_failed(self, task_repo):
-        """update_status with 'failed' sets error_message and finished_at."""
-        task = _make_task()
-        await task_repo.create(task)
-
-        await task_repo.update_status(
-            "task-001",
-            "failed",
-            error_message="Timeout after 10 minutes",
-        )
-
-        updated = await task_repo.get("task-001")
-        assert updated is not None
-        assert updated.status == "failed"
-        assert updated.finished_at is not None
-        assert updated.error_message == "Timeout after 10 minutes"
-
-    async def test_update_status_with_session_id(self, task_repo):
-        """update_status can set session_id."""
-        task = _make_task()
-        await task_repo.create(task)
+    @pytest.mark.parametrize(
+        "status,fields,finished",
+        [
+            (
+                "completed",
+                {
+                    "result_summary": "All tests pass",
+                    "commits": [{"sha": "abc123", "message": "Fix bug"}],
+                },
+                True,
+            ),
+            ("failed", {"error_message": "Timeout after 10 minutes"}, True),
+            # Non-terminal status should not set finished_at
+            ("running", {"session_id": "sess-abc"}, False),
+        ],
+    )
+    async def test_update_status(self, task_repo, status, fields, finished):
+        """update_status sets status, optional fields, and terminal finished_at."""
+        await task_repo.create(_make_task())
 
-        await task_repo.update_status(
-            "task-001",
-            "running",
-            session_id="sess-abc",
-        )
+        await task_repo.update_status("task-001", status, **fields)
 
         updated = await task_repo.get("task-001")
         assert updated is not None
-        assert updated.session_id == "sess-abc"
-        # Non-terminal status should not set finished_at
-        assert updated.finished_at is None
+        assert updated.status == status
+        assert (updated.finished_at is not None) is finished
+        for name, value in fields.items():
+            assert getattr(updated, name) == value
 
     async def test_update_progress(self, task_repo):
         """update_progress accumulates cost and increments turns."""
@@ -138,18 +133,31 @@ class TestTaskRepository:
 
         updated = await task_repo.get("task-001")
         assert updated is not None
-        assert updated.total_cost == pytest.approx(0.15)
+        assert updated.total_cost == 0.15
         assert updated.total_turns == 2
         assert updated.last_output == "Step 2 done"
 
+    async def test_create_many_failure_rolls_back(self, task_repo):
+        """A failed batch leaves no rows behind and does not keep the lock."""
+        with pytest.raises(sqlite3.IntegrityError):
+            await task_repo.create_many(
+                [_make_task(task_id="dup-1"), _make_task(task_id="dup-1")]
+            )
+
+        assert await task_repo.get("dup-1") is None
+        await task_repo.create(_make_task(task_id="after-1"))
+        assert await task_repo.get("after-1") is not None
+
     async def test_get_running_for_project(self, task_repo):
         """get_running_for_project returns the running task for a path."""
-        running = _make_task(task_id="run-1", status="running")
-        completed = _make_task(task_id="done-1", status="completed")
-        await task_repo.create(running)
-        await task_repo.create(completed)
+        await task_repo.create_many(
+            [
+                _make_task(task_id="run-1", status="running"),
+                _make_task(task_id="done-1", status="completed"),
+            ],
+        )
 
-        result = await task_repo.get_running_for_project(Path("/projects/myapp"))
+        result = await task_repo.get_running_for_project(_DEFAULT_PROJECT)
         assert result is not None
         assert result.task_id == "run-1"
 
@@ -158,78 +166,109 @@ class TestTaskRepository:
         completed = _make_task(task_id="done-1", status="completed")
         await task_repo.create(completed)
 
-        result = await task_repo.get_running_for_project(Path("/projects/myapp"))
+        result = await task_repo.get_running_for_project(_DEFAULT_PROJECT)
         assert result is None
 
     async def test_get_all_running(self, task_repo):
         """get_all_running returns all tasks with status 'running'."""
-        await task_repo.create(_make_task(task_id="r1", status="running"))
-        await task_repo.create(
-            _make_task(
-                task_id="r2",
-                status="running",
-                project_path=Path("/projects/other"),
-            )
+        await task_repo.create_many(
+            [
+                _make_task(task_id="r1", status="running"),
+                _make_task(
+                    task_id="r2",
+                    status="running",
+                    project_path=_OTHER_PROJECT,
+                ),
+                _make_task(task_id="c1", status="completed"),
+            ],
         )
-        await task_repo.create(_make_task(task_id="c1", status="completed"))
 
         running = await task_repo.get_all_running()
-        assert len(running) == 2
-        running_ids = {t.task_id for t in running}
-        assert running_ids == {"r1", "r2"}
+        assert sorted(t.task_id for t in running) == ["r1", "r2"]
 
     async def test_count_running(self, task_repo):
         """count_running returns the number of running tasks."""
         assert await task_repo.count_running() == 0
 
-        await task_repo.create(_make_task(task_id="r1", status="running"))
-        assert await task_repo.count_running() == 1
-
-        await task_repo.create(
-            _make_task(
-                task_id="r2",
-                status="running",
-                project_path=Path("/projects/other"),
-            )
+        await task_repo.create_many(
+            [
+                _make_task(task_id="r1", status="running"),
+                _make_task(
+                    task_id="r2",
+                    status="running",
+                    project_path=_OTHER_PROJECT,
+                ),
+                _make_task(task_id="c1", status="completed"),
+            ],
         )
-        assert await task_repo.count_running() == 2
 
-        await task_repo.create(_make_task(task_id="c1", status="completed"))
         assert await task_repo.count_running() == 2
 
-    async def test_get_last_completed(self, task_repo):
-        """get_last_completed returns the most recently finished task."""
-        # Create two completed tasks
-        task1 = _make_task(task_id="t1", status="running")
-        await task_repo.create(task1)
-        await task_repo.update_status("t1", "completed", result_summary="First")
-
-        task2 = _make_task(task_id="t2", status="running")
-        await task_repo.create(task2)
-        await task_repo.update_status("t2", "failed", error_message="Broke")
-
-        last = await task_repo.get_last_completed(Path("/projects/myapp"))
-        assert last is not None
-        # t2 was finished after t1 so it should be returned
-        assert last.task_id == "t2"
-        assert last.status == "failed"
-
-    async def test_get_last_completed_none(self, task_repo):
-        """get_last_completed returns None when no completed tasks exist."""
-        await task_repo.create(_make_task(task_id="r1", status="running"))
-
-        result = await task_repo.get_last_completed(Path("/projects/myapp"))
-        assert result is None
-
-    async def test_get_last_completed_different_project(self, task_repo):
-        """get_last_completed only considers tasks for the given project."""
-        other = _make_task(
-            task_id="o1",
-            status="running",
-            project_path=Path("/projects/other"),
-        )
-        await task_repo.create(other)
-        await task_repo.update_status("o1", "completed", result_summary="Other done")
+    @pytest.mark.parametrize(
+        "tasks,expected",
+        [
+            # t2 is finished after t1, so it wins regardless of insert order
+            (
+                [
+                    _make_task(
+                        task_id="t2",
+                        status="failed",
+                        finished_at=_FIXED_NOW + timedelta(minutes=2),
+                        error_message="Broke",
+                    ),
+                    _make_task(
+                        task_id="t1",
+                        status="completed",
+                        finished_at=_FIXED_NOW + timedelta(minutes=1),
+                        result_summary="First",
+                    ),
+                ],
+                ("t2", "failed"),
+            ),
+            # No finished tasks
+            ([_make_task(task_id="r1")], None),
+            # Only tasks for the given project are considered
+            (
+                [
+                    _make_task(
+                        task_id="o1",
+                        project_path=_OTHER_PROJECT,
+                        status="completed",
+                        finished_at=_FIXED_NOW,
+                        result_summary="Other done",
+                    )
+                ],
+                None,
+            ),
+        ],
+        ids=["most-recent", "none-finished", "other-project"],
+    )
+    async def test_get_last_completed(self, task_repo, tasks, expected):
+        """get_last_completed returns the project's most recently finished task."""
+        await task_repo.create_many(tasks)
+
+        last = await task_repo.get_last_completed(_DEFAULT_PROJECT)
+        if expected is None:
+            assert last is None
+        else:
+            assert last is not None
+            assert (last.task_id, last.status) == expected
+
+    @pytest.mark.parametrize(
+        "sql,index",
+        [
+            (TaskRepository._RUNNING_FOR_PROJECT_SQL, "idx_tasks_project_status"),
+            (TaskRepository._LAST_COMPLETED_SQL, "idx_tasks_project_finished"),
+        ],
+        ids=["running-for-project", "last-completed"],
+    )
+    async def test_project_lookups_use_index(self, task_repo, sql, index):
+        """Per-project lookups are served by an index without sorting rows."""
+        async with task_repo.db.get_connection() as conn:
+            cursor = await conn.execute(
+                f"EXPLAIN QUERY PLAN {sql}", (str(_DEFAULT_PROJECT),)
+            )
+            plan = " ".join(row["detail"] for row in await cursor.fetchall())
 
-        result = await task_repo.get_last_completed(Path("/projects/myapp"))
-        assert result is None
+        assert f"USING INDEX {index}" in plan
+        assert "TEMP B-TREE" not in plan